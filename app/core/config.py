@@ -1,8 +1,11 @@
-from pydantic_settings import BaseSettings
-from typing import List, Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import FrozenSet, List, Optional
+from functools import cached_property, lru_cache
 from pydantic import field_validator
 
 class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
+    
     # OpenAI Configuration
     OPENAI_API_KEY: str
     OPENAI_MODEL: str = "gpt-4-turbo-preview"
@@ -11,18 +14,26 @@ class Settings(BaseSettings):
     OPENAI_EXTRACTION_MODEL: str = "gpt-4-turbo-preview"
     OPENAI_EXTRACTION_TEMPERATURE: float = 0.1
     OPENAI_EXTRACTION_MAX_TOKENS: int = 200
-    OPENAI_QUERY_GEN_MODEL: str = "gpt-4-turbo-preview"
+    OPENAI_QUERY_GEN_MODEL: str = "gpt-4o-mini"  # Small model is enough for query rewriting
     OPENAI_QUERY_GEN_TEMPERATURE: float = 0.3
     OPENAI_QUERY_GEN_MAX_TOKENS: int = 200
     OPENAI_VISION_MODEL: str = "gpt-4-vision-preview"
     OPENAI_VISION_MAX_TOKENS: int = 500
     OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-small"
     
+    # Embedding Backend Configuration
+    EMBEDDING_BACKEND: str = "openai"  # "openai" or "local" (sentence-transformers; needs an index of matching dimension)
+    LOCAL_EMBEDDING_MODEL: str = "BAAI/bge-small-en-v1.5"
+    LOCAL_EMBEDDING_BATCH_SIZE: int = 64
+    LOCAL_EMBEDDING_DEVICE: Optional[str] = None  # e.g. "cuda", "cpu"; auto-detected when unset
+    
     # Pinecone Configuration
     PINECONE_API_KEY: str
     PINECONE_ENVIRONMENT: str = "us-east-1"
     PINECONE_INDEX_NAME: str = "rag-chatbot-index"
     PINECONE_BATCH_SIZE: int = 100
+    PINECONE_USE_GRPC: bool = False  # Requires pinecone[grpc]; upserts are pipelined over one HTTP/2 channel
+    PINECONE_GRPC_BATCH_SIZE: int = 200  # Protobuf payloads are compact enough for larger batches under the 2 MB limit
     PINECONE_RAG_K: int = 50  # Increased for better context retrieval
     PINECONE_RAG_SIMILARITY_THRESHOLD: float = 0.0  # Disable threshold filtering - use all retrieved results
     
@@ -31,6 +42,9 @@ class Settings(BaseSettings):
     SUPABASE_KEY: str
     SUPABASE_SERVICE_KEY: str
     SUPABASE_TABLE_NAME: str = "user_data"
+    SUPABASE_HTTP2: bool = True  # Requires the h2 package (httpx[http2])
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    SUPABASE_MAX_CONNECTIONS: int = 100
     
     # Email Configuration
     EMAIL_FROM: str
@@ -42,18 +56,36 @@ class Settings(BaseSettings):
     SENDGRID_ENABLED: bool = True
     
     # Document Processing Configuration
+    DOCUMENT_WARMUP_ON_STARTUP: bool = True  # Build the document service (model load, index lookup) before serving
     DOCUMENT_CHUNK_SIZE: int = 1500
     DOCUMENT_CHUNK_OVERLAP: int = 150
+    DOCUMENT_PARSE_CACHE_SIZE: int = 16  # Parsed documents kept in memory by content hash (0 disables)
+    DOCUMENT_MIN_CHUNK_CHARS: int = 32  # Shorter chunks (page numbers, stray fragments) are not indexed
     DOCUMENT_EMBEDDING_BATCH_SIZE: int = 100
     DOCUMENT_EMBEDDING_PARALLEL_WORKERS: int = 5  # Number of parallel workers for embedding generation
     DOCUMENT_PINECONE_UPSERT_PARALLEL_WORKERS: int = 10  # Number of parallel workers for Pinecone upsert
-    DOCUMENT_IMAGE_EXTRACTION_PARALLEL_WORKERS: int = 5  # Number of parallel workers for image extraction/description
+    DOCUMENT_IMAGE_EXTRACTION_PARALLEL_WORKERS: int = 5  # Max concurrent Vision requests for image description
+    DOCUMENT_IMAGE_MAX_DIMENSION: int = 2048  # Larger images are downscaled before Vision calls
+    DOCUMENT_IMAGE_DOWNSCALE_MIN_BYTES: int = 256 * 1024  # Smaller images are sent as-is
+    DOCUMENT_PDF_PARSE_WORKERS: int = 0  # Worker processes for PDF text/table extraction (0 = CPU count)
+    DOCUMENT_PDF_PARALLEL_MIN_PAGES: int = 64  # Smaller PDFs are parsed in-process (pool dispatch isn't worth it)
     
     # Chat Configuration
     CHAT_HISTORY_LIMIT: int = 5
     CHAT_RAG_ENABLED: bool = True
     CHAT_QUERY_GEN_ENABLED: bool = True  # Enable/disable query generation for speed
     CHAT_PARALLEL_SEARCH: bool = True  # Enable parallel vector search
+    RAG_SEARCH_MAX_WORKERS: int = 32  # Threads shared by all parallel vector searches
+    RAG_PER_REQUEST_CONCURRENCY: int = 5  # Searches one retrieval may have in flight on the shared pool
+    RAG_MAX_QUERIES: int = 10  # Distinct search queries issued per retrieval (including the original message)
+    RAG_FALLBACK_MS: int = -1  # Hedge: start the direct vector-store fallback if multi-query search takes longer (-1 = only after a miss)
+    RAG_QUERY_CACHE_MAX_SIZE: int = 1024  # Generated search queries cached per normalized message
+    RAG_QUERY_CACHE_TTL: float = 600.0
+    RAG_JSON_RECOVERY: bool = True  # Salvage complete queries from truncated/malformed query-generation JSON
+    RAG_SEMANTIC_CACHE_ENABLED: bool = True  # Reuse context retrieved for near-identical questions
+    RAG_SEMANTIC_CACHE_THRESHOLD: float = 0.95  # Minimum cosine similarity for a cache hit
+    RAG_SEMANTIC_CACHE_TTL: float = 600.0  # Seconds a cached context stays valid
+    RAG_SEMANTIC_CACHE_MAX_SIZE: int = 256
     
     # Data Validation Configuration
     VALIDATION_NAME_MIN_LENGTH: int = 2
@@ -78,14 +110,17 @@ class Settings(BaseSettings):
             return v
         return v
     
-    @property
-    def invalid_name_words_list(self) -> List[str]:
-        """Parse invalid name words from comma-separated string"""
-        return [word.strip().lower() for word in self.VALIDATION_NAME_INVALID_WORDS.split(',') if word.strip()]
-    
-    
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    @cached_property
+    def invalid_name_words_set(self) -> FrozenSet[str]:
+        """Parse invalid name words from comma-separated string (computed once)"""
+        return frozenset(word.strip().lower() for word in self.VALIDATION_NAME_INVALID_WORDS.split(',') if word.strip())
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get application settings (parsed from env/.env once per process)"""
+    return Settings()
+
+
+settings = get_settings()
 
-settings = Settings()
@@ -1,5 +1,9 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
+import threading
 from pathlib import Path
 from datetime import datetime
 
@@ -14,6 +18,52 @@ LOG_FILE = LOG_DIR / f"app_{datetime.now().strftime('%Y%m%d')}.log"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+# File log buffering (batches many records into a single write)
+LOG_FILE_BUFFER_SIZE = 64 * 1024
+LOG_FILE_FLUSH_INTERVAL = 1.0  # Seconds
+
+# Background listener that owns the real (blocking) output handlers
+_queue_listener: logging.handlers.QueueListener = None
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    File handler that buffers writes instead of flushing every record
+    
+    The buffer is flushed when a WARNING (or higher) record is written and
+    periodically from a daemon thread, so lines reach disk within
+    `flush_interval` seconds.
+    """
+    
+    def __init__(self, filename, encoding: str = 'utf-8', buffer_size: int = LOG_FILE_BUFFER_SIZE, flush_interval: float = LOG_FILE_FLUSH_INTERVAL):
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        super().__init__(filename, encoding=encoding)
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="log-flusher", daemon=True)
+        self._flusher.start()
+    
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=self.buffer_size, encoding=self.encoding, errors=self.errors)
+    
+    def emit(self, record: logging.LogRecord):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= logging.WARNING:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+    
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+    
+    def close(self):
+        self._closed.set()
+        super().close()
+
 def setup_logging(log_level: str = "INFO"):
     """
     Set up logging configuration for the application
@@ -21,21 +71,33 @@ def setup_logging(log_level: str = "INFO"):
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
     """
+    global _queue_listener
+    
     # Convert string to logging level
     numeric_level = getattr(logging, log_level.upper(), logging.INFO)
     
+    # Records are formatted by the QueueHandler on the calling thread and
+    # written by the listener thread, so request paths never block on I/O
+    log_queue = queue.SimpleQueue()
+    
     # Configure root logger
     logging.basicConfig(
         level=numeric_level,
         format=LOG_FORMAT,
         datefmt=DATE_FORMAT,
-        handlers=[
+        handlers=[logging.handlers.QueueHandler(log_queue)]
+    )
+    
+    if _queue_listener is None:
+        _queue_listener = logging.handlers.QueueListener(
+            log_queue,
             # Console handler (stdout)
             logging.StreamHandler(sys.stdout),
-            # File handler
-            logging.FileHandler(LOG_FILE, encoding='utf-8')
-        ]
-    )
+            # File handler (buffered)
+            BufferedFileHandler(LOG_FILE, encoding='utf-8')
+        )
+        _queue_listener.start()
+        atexit.register(_queue_listener.stop)
     
     # Set specific loggers
     logging.getLogger("uvicorn").setLevel(logging.INFO)
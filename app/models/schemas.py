@@ -1,31 +1,39 @@
 """Pydantic schemas for request/response models"""
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from typing import List, Dict, Any, Optional
 
 
+class UserData(BaseModel):
+    """User data model"""
+    model_config = ConfigDict(extra='ignore', coerce_numbers_to_str=True)
+    
+    name: Optional[str] = None
+    email: Optional[str] = None
+    income: Optional[str] = None
+
+
 class ChatMessage(BaseModel):
     """Chat message request model"""
+    model_config = ConfigDict(extra='ignore')
+    
     message: str
     conversation_history: List[Dict[str, str]] = []
-    user_data: Optional[Dict[str, Any]] = {}
+    user_data: Optional[UserData] = None
 
 
 class ChatResponse(BaseModel):
     """Chat response model"""
+    model_config = ConfigDict(extra='ignore')
+    
     response: str
     user_data: Dict[str, Any]
     rag_used: bool
 
 
-class UserData(BaseModel):
-    """User data model"""
-    name: Optional[str] = None
-    email: Optional[str] = None
-    income: Optional[str] = None
-
-
 class DocumentStats(BaseModel):
     """Document statistics model"""
+    model_config = ConfigDict(extra='ignore')
+    
     total_vectors: int = 0
     dimension: int = 0
     index_fullness: float = 0.0
@@ -34,9 +42,10 @@ class DocumentStats(BaseModel):
 
 class ProcessingResult(BaseModel):
     """Document processing result model"""
+    model_config = ConfigDict(extra='ignore')
+    
     success: bool
     filename: Optional[str] = None
     chunks_processed: Optional[int] = None
     total_chars: Optional[int] = None
     error: Optional[str] = None
-
@@ -1,45 +1,114 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import StreamingResponse
 from typing import Dict, Any
-import json
+from functools import lru_cache
+import asyncio
+import time
+import orjson
 from app.models.schemas import ChatMessage, ChatResponse
 from app.services.chat_service import ChatbotService
 from app.core.logging_config import get_logger
+from app.utils.sse import format_sse_event
 
 router = APIRouter()
-chatbot_service = ChatbotService()
 logger = get_logger(__name__)
 
+SSE_CHUNK_FLUSH_CHARS = 256  # Flush buffered tokens once this many characters are pending
+SSE_CHUNK_FLUSH_INTERVAL = 0.01  # Max seconds a buffered token waits before its frame is sent
+
+
+@lru_cache(maxsize=1)
+def get_chatbot_service() -> ChatbotService:
+    """Get or create chatbot service (lazy singleton)"""
+    return ChatbotService()
+
+
 @router.post("/stream")
-async def chat_stream(message_data: ChatMessage):
+async def chat_stream(
+    message_data: ChatMessage,
+    chatbot_service: ChatbotService = Depends(get_chatbot_service)
+):
     """Handle chat messages with streaming response"""    
-    def generate():
+    async def generate():
         """Generator function that yields SSE events"""
+        # Contiguous token chunks are coalesced into fewer SSE frames
+        chunk_buffer = []
+        buffered_chars = 0
+        last_flush = time.monotonic()
+        
+        def flush_chunks() -> bytes:
+            nonlocal buffered_chars, last_flush
+            frame = format_sse_event({"type": "chunk", "data": "".join(chunk_buffer)})
+            chunk_buffer.clear()
+            buffered_chars = 0
+            last_flush = time.monotonic()
+            return frame
+        
+        # Call the streaming method (an async generator)
+        events = chatbot_service.get_chat_response_stream(
+            message=message_data.message,
+            conversation_history=message_data.conversation_history,
+            user_data=message_data.user_data.model_dump(exclude_none=True) if message_data.user_data else {}
+        )
+        next_event = None
         try:
-            # Call the streaming method (which is a regular generator)
-            for event in chatbot_service.get_chat_response_stream(
-                message=message_data.message,
-                conversation_history=message_data.conversation_history,
-                user_data=message_data.user_data
-            ):
+            while True:
+                if next_event is None:
+                    next_event = asyncio.ensure_future(events.__anext__())
+                if chunk_buffer:
+                    # Flush a partial buffer on time even when the next token is slow to arrive
+                    # (waiting on the task, not cancelling it, keeps the stream intact)
+                    timeout = max(0.0, last_flush + SSE_CHUNK_FLUSH_INTERVAL - time.monotonic())
+                    done, _ = await asyncio.wait({next_event}, timeout=timeout)
+                    if not done:
+                        yield flush_chunks()
+                        continue
+                try:
+                    event = await next_event
+                except StopAsyncIteration:
+                    next_event = None
+                    break
+                next_event = None
+                
+                if event.get("type") == "chunk":
+                    chunk_buffer.append(event["data"])
+                    buffered_chars += len(event["data"])
+                    if (buffered_chars >= SSE_CHUNK_FLUSH_CHARS or
+                            time.monotonic() - last_flush >= SSE_CHUNK_FLUSH_INTERVAL):
+                        yield flush_chunks()
+                    continue
+                
+                if chunk_buffer:
+                    yield flush_chunks()
+                
                 # Format as Server-Sent Events (SSE)
-                # Ensure proper JSON serialization
                 try:
-                    event_json = json.dumps(event, ensure_ascii=False)
-                    yield f"data: {event_json}\n\n"
-                except Exception as e:
+                    yield format_sse_event(event)
+                except orjson.JSONEncodeError as e:
                     # Send error event instead
                     error_event = {
                         "type": "error",
                         "error": "Error formatting response"
                     }
-                    yield f"data: {json.dumps(error_event)}\n\n"
+                    yield format_sse_event(error_event)
+            
+            if chunk_buffer:
+                yield flush_chunks()
         except Exception as e:
             error_event = {
                 "type": "error",
                 "error": "Sorry, I'm having trouble right now. Please try again."
             }
-            yield f"data: {json.dumps(error_event)}\n\n"
+            yield format_sse_event(error_event)
+        finally:
+            # Client went away mid-stream: stop the service stream and close its upstream connection
+            if next_event is not None:
+                next_event.cancel()
+                await asyncio.wait({next_event})
+            try:
+                await events.aclose()
+            except Exception:
+                pass
     
     return StreamingResponse(
         generate(),
@@ -1,18 +1,28 @@
-from fastapi import APIRouter, HTTPException
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends
+from typing import List, Optional
+from functools import lru_cache
 from app.models.schemas import UserData
 from app.services.data_service import DataService
 from app.core.logging_config import get_logger
 
 router = APIRouter()
-data_service = DataService()
 logger = get_logger(__name__)
 
+
+@lru_cache(maxsize=1)
+def get_data_service() -> DataService:
+    """Get or create data service (lazy singleton)"""
+    return DataService()
+
+
 @router.post("/save")
-async def save_user_data(user_data: UserData):
+async def save_user_data(
+    user_data: UserData,
+    data_service: DataService = Depends(get_data_service)
+):
     """Save user data to database"""
     try:
-        data_dict = user_data.dict(exclude_none=True)
+        data_dict = user_data.model_dump(exclude_none=True)
         result = data_service.save_user_data(data_dict)
         if result.get("success"):
             return {
@@ -30,8 +40,36 @@ async def save_user_data(user_data: UserData):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/save-bulk")
+async def save_user_data_bulk(
+    users: List[UserData],
+    data_service: DataService = Depends(get_data_service)
+):
+    """Save many users to database in a single request"""
+    try:
+        result = data_service.save_user_data_bulk([user.model_dump(exclude_none=True) for user in users])
+        if result.get("success"):
+            return {
+                "success": True,
+                "inserted": len(result.get("inserted", [])),
+                "already_exists": len(result.get("already_exists", [])),
+                "message": "User data saved successfully"
+            }
+        else:
+            raise HTTPException(
+                status_code=500,
+                detail=result.get("error", "Failed to save user data")
+            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/")
-async def get_user_data(user_id: Optional[int] = None):
+async def get_user_data(
+    user_id: Optional[int] = None,
+    data_service: DataService = Depends(get_data_service)
+):
     """Retrieve user data"""
     try:
         data = data_service.get_user_data(user_id)
@@ -1,135 +1,119 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from fastapi.responses import JSONResponse, StreamingResponse
 import tempfile
 import os
 import time
-import json
 import asyncio
-import threading
-from queue import Queue
-from pathlib import Path
+import aiofiles
+import aiofiles.os
+from functools import lru_cache
 from app.services.document_service import DocumentService
 from app.core.logging_config import get_logger
+from app.utils.sse import format_sse_event
 
 router = APIRouter()
-document_service = DocumentService()
 logger = get_logger(__name__)
 
-ALLOWED_EXTENSIONS = {'.docx', '.doc', '.pdf', '.txt'}
+
+@lru_cache(maxsize=1)
+def get_document_service() -> DocumentService:
+    """Get or create document service (lazy singleton)"""
+    return DocumentService()
+
+
+ALLOWED_EXTENSIONS = frozenset({'.docx', '.doc', '.pdf', '.txt'})
+UPLOAD_CHUNK_SIZE = 64 * 1024  # Bytes read per chunk when saving uploads
+
+# Strong references to fire-and-forget tasks so they aren't garbage collected
+_background_tasks = set()
+
+
+async def _remove_temp_file(path: str):
+    """Delete a temporary upload file, ignoring files that are already gone"""
+    try:
+        await aiofiles.os.unlink(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Failed to remove temp file {path}: {e}")
+
 
 @router.post("/upload")
-async def upload_document(file: UploadFile = File(...)):
+async def upload_document(
+    file: UploadFile = File(...),
+    document_service: DocumentService = Depends(get_document_service)
+):
     """Upload and process document for RAG with streaming progress"""
-    workflow_start = time.time()    
+    workflow_start = time.perf_counter()
     # STEP 1: Validate and read file first (before generator)
-    file_ext = Path(file.filename).suffix.lower()
+    file_ext = os.path.splitext(file.filename)[1].lower()
     if file_ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
             detail=f"File type {file_ext} not allowed. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
         )
     
-    # Read file content before starting generator
-    content = await file.read()
-    file_size = len(content)    
-    # Save to temp file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp_file:
-        tmp_file.write(content)
-        tmp_path = tmp_file.name
+    # Stream upload to a temp file before starting generator
+    fd, tmp_path = tempfile.mkstemp(suffix=file_ext)
+    os.close(fd)
+    file_size = 0
+    async with aiofiles.open(tmp_path, 'wb') as tmp_file:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            await tmp_file.write(chunk)
+            file_size += len(chunk)
     
     async def process_with_streaming():
         """Process document with streaming progress updates"""
         try:
             # Send start event immediately
-            yield f"data: {json.dumps({'type': 'start', 'status': 'uploading', 'message': 'Starting document upload...', 'progress': 0})}\n\n"
+            yield format_sse_event({'type': 'start', 'status': 'uploading', 'message': 'Starting document upload...', 'progress': 0})
             
-            yield f"data: {json.dumps({'type': 'progress', 'status': 'validating', 'message': 'File validated', 'progress': 5})}\n\n"
-            yield f"data: {json.dumps({'type': 'progress', 'status': 'uploading', 'message': f'File received ({file_size / 1024 / 1024:.2f} MB)', 'progress': 10})}\n\n"
+            yield format_sse_event({'type': 'progress', 'status': 'validating', 'message': 'File validated', 'progress': 5})
+            yield format_sse_event({'type': 'progress', 'status': 'uploading', 'message': f'File received ({file_size / 1024 / 1024:.2f} MB)', 'progress': 10})
             
             # STEP 3: Process document with progress callbacks
-            step_start = time.time()
-            
-            # Create a thread-safe queue for progress updates
-            progress_queue = Queue()
-            processing_done = threading.Event()
+            # Progress updates are handed from the worker thread to the event loop
+            loop = asyncio.get_running_loop()
+            progress_queue: asyncio.Queue = asyncio.Queue()
             
             def progress_callback(status: str, message: str, progress: int):
                 """Callback to send progress updates (called from sync thread)"""
-                try:
-                    event = {
-                        "type": "progress",
-                        "status": status,
-                        "message": message,
-                        "progress": progress
-                    }
-                    progress_queue.put(event)
-                except Exception as e:
-                    pass
-            # Shared result variable
-            result_container = {'result': None}
-            
-            # Function to process document in background thread
-            def process_doc():
-                try:
-                    result_container['result'] = document_service.process_document(tmp_path, file.filename, progress_callback)
-                finally:
-                    processing_done.set()
-            
-            # Start processing in background thread
-            process_thread = threading.Thread(target=process_doc)
-            process_thread.start()
-            
-            # Yield progress updates while processing
-            while not processing_done.is_set() or not progress_queue.empty():
-                try:
-                    # Wait for progress update with timeout
-                    try:
-                        event = progress_queue.get(timeout=0.1)
-                        yield f"data: {json.dumps(event)}\n\n"
-                    except:
-                        # Timeout or empty queue, check if still processing
-                        if not processing_done.is_set():
-                            # Small delay to avoid busy waiting (use asyncio.sleep in async generator)
-                            await asyncio.sleep(0.05)
-                            continue
-                        else:
-                            # Processing done, drain remaining queue
-                            while not progress_queue.empty():
-                                try:
-                                    event = progress_queue.get_nowait()
-                                    yield f"data: {json.dumps(event)}\n\n"
-                                except:
-                                    break
-                            break
-                except:
-                    break
+                event = {
+                    "type": "progress",
+                    "status": status,
+                    "message": message,
+                    "progress": progress
+                }
+                loop.call_soon_threadsafe(progress_queue.put_nowait, event)
             
-            # Wait for thread to complete
-            process_thread.join()
+            # Process document in a worker thread; a None sentinel marks completion
+            process_task = asyncio.create_task(
+                asyncio.to_thread(document_service.process_document, tmp_path, file.filename, progress_callback)
+            )
+            process_task.add_done_callback(lambda _: progress_queue.put_nowait(None))
             
-            # Get result from container
-            result = result_container['result']
+            # Yield progress updates as they arrive
+            while (event := await progress_queue.get()) is not None:
+                yield format_sse_event(event)
             
-            process_duration = time.time() - step_start
+            result = process_task.result()
             
             if result.get("success"):
-                total_duration = time.time() - workflow_start
+                total_duration = time.perf_counter() - workflow_start
                 
-                yield f"data: {json.dumps({'type': 'complete', 'success': True, 'message': 'Document processed and indexed successfully', 'filename': result['filename'], 'chunks_processed': result['chunks_processed'], 'total_chars': result['total_chars'], 'processing_time': round(total_duration, 2)})}\n\n"
+                yield format_sse_event({'type': 'complete', 'success': True, 'message': 'Document processed and indexed successfully', 'filename': result['filename'], 'chunks_processed': result['chunks_processed'], 'total_chars': result['total_chars'], 'processing_time': round(total_duration, 2)})
             else:
-                yield f"data: {json.dumps({'type': 'error', 'error': result.get('error', 'Failed to process document')})}\n\n"
+                yield format_sse_event({'type': 'error', 'error': result.get('error', 'Failed to process document')})
         except Exception as e:
-            total_duration = time.time() - workflow_start
             try:
-                yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+                yield format_sse_event({'type': 'error', 'error': str(e)})
             except Exception as yield_error:
                 pass
         finally:
-            # Clean up temporary file
-            if 'tmp_path' in locals() and tmp_path and os.path.exists(tmp_path):
-                cleanup_start = time.time()
-                os.unlink(tmp_path)
-                cleanup_duration = time.time() - cleanup_start
+            # Clean up temporary file in the background so the stream closes immediately
+            cleanup_task = asyncio.create_task(_remove_temp_file(tmp_path))
+            _background_tasks.add(cleanup_task)
+            cleanup_task.add_done_callback(_background_tasks.discard)
     
     return StreamingResponse(
         process_with_streaming(),
@@ -145,7 +129,7 @@ async def upload_document(file: UploadFile = File(...)):
     )
 
 @router.get("/stats")
-async def get_document_stats():
+async def get_document_stats(document_service: DocumentService = Depends(get_document_service)):
     """Get document indexing statistics"""
     try:
         stats = document_service.get_document_stats()
@@ -154,7 +138,10 @@ async def get_document_stats():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/{filename}")
-async def delete_document(filename: str):
+async def delete_document(
+    filename: str,
+    document_service: DocumentService = Depends(get_document_service)
+):
     """Delete a document from the vector database"""
     try:
         success = document_service.delete_document(filename)
@@ -1,11 +1,12 @@
 """Main chatbot service - orchestrates conversation flow"""
 from langchain_openai import ChatOpenAI
 from typing import List, Dict, Any, Optional
+import asyncio
 import json
 import time
 from app.core.config import settings
 from app.core.logging_config import get_logger
-from app.utils.dependencies import get_openai_client
+from app.utils.dependencies import get_async_openai_client
 from app.services.rag_service import RAGService
 from app.services.data_extraction_service import DataExtractionService
 from app.services.response_builder import ResponseBuilder
@@ -18,7 +19,7 @@ class ChatbotService:
     """Main chatbot service orchestrating conversation flow"""
     
     def __init__(self):
-        self.client = get_openai_client()
+        self.async_client = get_async_openai_client()
         self.llm = ChatOpenAI(
             model_name=settings.OPENAI_MODEL,
             temperature=settings.OPENAI_TEMPERATURE,
@@ -29,49 +30,47 @@ class ChatbotService:
         self.response_builder = ResponseBuilder()
         self.data_service = DataService()
     
-    def get_chat_response_stream(
+    async def get_chat_response_stream(
         self,
         message: str,
         conversation_history: List[Dict[str, str]],
         user_data: Optional[Dict[str, Any]] = None
     ):
-        """Generate chatbot response with streaming support"""
+        """Generate chatbot response with streaming support
+        
+        Blocking service calls (extraction, RAG, persistence) run in worker
+        threads so the event loop stays free while the response streams.
+        """
         try:
             yield {"type": "start", "status": "processing"}
             
             user_data = user_data or {}
-            original_user_data = user_data.copy()
             
             # Check if user data is complete
-            has_all_user_data = self.data_extraction_service.is_data_complete(user_data)
+            validation = self.data_extraction_service.validate_user_data(user_data)
+            has_all_user_data = all(validation.values())
             had_all_data_before = has_all_user_data
             
-            # Extract user data if incomplete
-            extracted_data = None
+            # Extract user data if incomplete (reuses the validation above)
+            changed_fields = set()
             if not has_all_user_data:
-                extracted_data = self.data_extraction_service.extract_user_data(message, user_data)
-                user_data = extracted_data
-                has_all_user_data = self.data_extraction_service.is_data_complete(user_data)
+                user_data, validation, changed_fields = await asyncio.to_thread(
+                    self.data_extraction_service.extract_user_data, message, user_data, validation
+                )
+                has_all_user_data = all(validation.values())
             
             # Track if data was just completed in this request
             data_just_completed = not had_all_data_before and has_all_user_data
             
             # Check if new data was actually extracted
-            new_data_extracted = False
-            if extracted_data:
-                for field in ['name', 'email', 'income']:
-                    original_value = original_user_data.get(field, '')
-                    new_value = extracted_data.get(field, '')
-                    if new_value and new_value != original_value:
-                        new_data_extracted = True
-                        break
+            new_data_extracted = bool(changed_fields)
             
             # Retrieve RAG context
             rag_context = None
             rag_used = False
             if has_all_user_data and settings.CHAT_RAG_ENABLED and not data_just_completed:
                 yield {"type": "progress", "status": "rag_search", "message": "Searching knowledge base..."}
-                rag_context = self.rag_service.retrieve_context(message)
+                rag_context = await self.rag_service.aretrieve_context(message)
                 rag_used = bool(rag_context)
             
             # Build messages
@@ -85,7 +84,7 @@ class ChatbotService:
             # Stream response
             yield {"type": "progress", "status": "generating", "message": "Generating response..."}
             
-            stream = self.client.chat.completions.create(
+            stream = await self.async_client.chat.completions.create(
                 model=settings.OPENAI_MODEL,
                 messages=messages,
                 temperature=settings.OPENAI_TEMPERATURE,
@@ -94,26 +93,21 @@ class ChatbotService:
             )
             
             response_text = ""
-            for chunk in stream:
+            async for chunk in stream:
                 try:
-                    if (chunk.choices and 
-                        len(chunk.choices) > 0 and 
-                        hasattr(chunk.choices[0], 'delta') and
-                        chunk.choices[0].delta and
-                        hasattr(chunk.choices[0].delta, 'content') and
-                        chunk.choices[0].delta.content is not None):
-                        
-                        content = chunk.choices[0].delta.content
-                        response_text += content
-                        yield {"type": "chunk", "data": content}
-                except Exception as e:
-                    logger.warning(f"Error processing chunk: {e}")
+                    content = chunk.choices[0].delta.content
+                except (IndexError, AttributeError):
+                    continue
+                if content is None:
                     continue
+                
+                response_text += content
+                yield {"type": "chunk", "data": content}
             
             # Save data only if data was just completed AND new data was extracted
             if data_just_completed and new_data_extracted:
                 try:
-                    result = self.data_service.save_user_data(user_data)
+                    result = await asyncio.to_thread(self.data_service.save_user_data, user_data)
                     if result.get('success'):
                         if result.get('already_exists'):
                             logger.info(f"User data already exists - ID: {result.get('id')}")
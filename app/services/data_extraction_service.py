@@ -1,7 +1,7 @@
 """Service for extracting user data from conversation"""
-from typing import Dict, Any, Optional
-import json
+from typing import Dict, Any, Optional, Set, Tuple
 import re
+import orjson
 from app.core.config import settings
 from app.core.logging_config import get_logger
 from app.utils.dependencies import get_openai_client
@@ -10,6 +10,26 @@ from app.utils.prompts import get_data_extraction_prompt
 
 logger = get_logger(__name__)
 
+_EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+_CAPITALIZED_WORD_RE = re.compile(r'\b[A-Z][a-zA-Z]+\b')
+_NUMBER_WORD_RE = re.compile(
+    r'\b(?:one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|'
+    r'thirteen|fourteen|fifteen|sixteen|seventeen|eighteen|nineteen|twenty|'
+    r'thirty|forty|fifty|sixty|seventy|eighty|ninety|hundred|thousand|'
+    r'million|grand)\b',
+    re.IGNORECASE
+)
+_SELF_INTRO_RE = re.compile(r"\b(?:name is|name's|i am|i'm|im|call me)\b", re.IGNORECASE)
+_SHORT_REPLY_MAX_WORDS = 3
+
+# (field, validator, compare case-insensitively)
+_FIELDS = (
+    ("name", validate_name, True),
+    ("email", validate_email, True),
+    ("income", validate_income, False),
+)
+_NULL_TOKENS = frozenset({"null", "none", ""})
+
 
 class DataExtractionService:
     """Service for extracting structured user data from natural language"""
@@ -20,10 +40,24 @@ class DataExtractionService:
     def extract_user_data(
         self,
         message: str,
-        existing_data: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any]:
-        """Extract user data from conversation using AI analysis"""
+        existing_data: Optional[Dict[str, Any]] = None,
+        validation: Optional[Dict[str, bool]] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, bool], Set[str]]:
+        """
+        Extract user data from conversation using AI analysis
+        
+        Returns the updated data together with its per-field validation and
+        the set of fields that changed, so callers don't have to re-validate
+        or diff. `validation` may carry results already computed for
+        `existing_data`.
+        """
         data = existing_data.copy() if existing_data else {}
+        validation = dict(validation) if validation is not None else self.validate_user_data(data)
+        changed: Set[str] = set()
+        
+        # Skip the LLM round-trip for messages that can't carry personal info
+        if existing_data and not self._may_contain_user_data(message):
+            return data, validation, changed
         
         try:
             extraction_prompt = get_data_extraction_prompt(message, existing_data or {})
@@ -41,74 +75,71 @@ class DataExtractionService:
                     }
                 ],
                 temperature=settings.OPENAI_EXTRACTION_TEMPERATURE,
-                max_tokens=settings.OPENAI_EXTRACTION_MAX_TOKENS
+                max_tokens=settings.OPENAI_EXTRACTION_MAX_TOKENS,
+                response_format={"type": "json_object"}
             )
             
-            extraction_text = extraction_response.choices[0].message.content.strip()
-            
-            # Clean up response
-            if extraction_text.startswith("```json"):
-                extraction_text = extraction_text[7:]
-            if extraction_text.startswith("```"):
-                extraction_text = extraction_text[3:]
-            if extraction_text.endswith("```"):
-                extraction_text = extraction_text[:-3]
-            extraction_text = extraction_text.strip()
-            
-            extracted_data = json.loads(extraction_text)
+            # JSON mode guarantees a bare JSON object (no markdown fences)
+            extracted_data = orjson.loads(extraction_response.choices[0].message.content)
             
             # Validate and update data
-            self._update_data_with_validation(data, extracted_data)
+            self._update_data_with_validation(data, extracted_data, validation, changed)
             
-        except json.JSONDecodeError as e:
-            self._fallback_email_extraction(message, data)
+        except orjson.JSONDecodeError as e:
+            self._fallback_email_extraction(message, data, validation, changed)
         except Exception as e:
-            self._fallback_email_extraction(message, data)
+            self._fallback_email_extraction(message, data, validation, changed)
         
-        return data
+        return data, validation, changed
+    
+    def _may_contain_user_data(self, message: str) -> bool:
+        """Cheap pre-filter: does the message plausibly contain a name, email or income?"""
+        if "@" in message or any(c.isdigit() for c in message):
+            return True
+        if _CAPITALIZED_WORD_RE.search(message):
+            return True
+        # Spelled-out amounts ("fifty thousand") and lowercase introductions
+        if _NUMBER_WORD_RE.search(message) or _SELF_INTRO_RE.search(message):
+            return True
+        # Short lowercase replies (e.g. "john smith") may still be a name
+        words = message.lower().split()
+        return (
+            0 < len(words) <= _SHORT_REPLY_MAX_WORDS and
+            any(word.strip(".,!?") not in settings.invalid_name_words_set for word in words)
+        )
     
-    def _update_data_with_validation(self, data: Dict[str, Any], extracted_data: Dict[str, Any]):
+    def _update_data_with_validation(self, data: Dict[str, Any], extracted_data: Dict[str, Any], validation: Dict[str, bool], changed: Set[str]):
         """Update data dictionary with validated extracted values"""
-        # Name validation and extraction
-        if extracted_data.get("name"):
-            name_value = extracted_data["name"]
-            name_str = str(name_value).strip() if name_value else ""
+        for field, validator, case_insensitive in _FIELDS:
+            value = extracted_data.get(field)
+            if not value:
+                continue
             
-            if (name_str and 
-                name_str.lower() not in ["null", "none", ""] and
-                validate_name(name_str)):
-                if not data.get("name") or name_str.lower() != data.get("name", "").lower():
-                    data["name"] = name_str
-        
-        # Email validation and extraction
-        if extracted_data.get("email"):
-            email_value = extracted_data["email"]
-            email_str = str(email_value).strip() if email_value else ""
+            value_str = str(value).strip()
+            if value_str.lower() in _NULL_TOKENS or not validator(value_str):
+                continue
             
-            if (email_str and 
-                email_str.lower() not in ["null", "none", ""] and
-                validate_email(email_str)):
-                if not data.get("email") or email_str.lower() != data.get("email", "").lower():
-                    data["email"] = email_str
-        
-        # Income validation and extraction
-        if extracted_data.get("income"):
-            income_value = extracted_data["income"]
-            income_str = str(income_value).strip() if income_value else ""
+            validation[field] = True
+            existing = data.get(field)
+            if not existing:
+                is_new = True
+            elif case_insensitive:
+                is_new = value_str.lower() != str(existing).lower()
+            else:
+                is_new = value_str != existing
             
-            if (income_str and 
-                income_str.lower() not in ["null", "none", ""] and
-                validate_income(income_str)):
-                if not data.get("income") or income_str != data.get("income", ""):
-                    data["income"] = income_str
+            if is_new:
+                data[field] = value_str
+                changed.add(field)
     
-    def _fallback_email_extraction(self, message: str, data: Dict[str, Any]):
+    def _fallback_email_extraction(self, message: str, data: Dict[str, Any], validation: Dict[str, bool], changed: Set[str]):
         """Fallback to regex-based email extraction"""
-        if "@" in message and not data.get("email"):
-            email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-            match = re.search(email_pattern, message)
+        if not data.get("email"):
+            match = _EMAIL_RE.search(message)
             if match:
                 data["email"] = match.group(0)
+                changed.add("email")
+                validation["email"] = validate_email(data["email"])
     
     def validate_user_data(self, user_data: Dict[str, Any]) -> Dict[str, bool]:
         """Validate all user data fields"""
@@ -117,9 +148,4 @@ class DataExtractionService:
             "email": validate_email(user_data.get("email", "")) if user_data.get("email") else False,
             "income": validate_income(user_data.get("income", "")) if user_data.get("income") else False
         }
-    
-    def is_data_complete(self, user_data: Dict[str, Any]) -> bool:
-        """Check if all required user data is collected and valid"""
-        validation = self.validate_user_data(user_data)
-        return all(validation.values())
 
@@ -1,17 +1,15 @@
-from supabase import create_client, Client
+from supabase import Client
 from typing import Dict, Any, List, Optional
 from app.core.config import settings
 from app.services.email_service import EmailService
+from app.utils.dependencies import get_supabase_client
 from app.core.logging_config import get_logger
 
 logger = get_logger(__name__)
 
 class DataService:
     def __init__(self):
-        self.supabase: Client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_SERVICE_KEY
-        )
+        self.supabase: Client = get_supabase_client()
         self.email_service = EmailService()
     
     def save_user_data(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -24,12 +22,18 @@ class DataService:
                 "income": user_data.get("income"),
             }
             
-            # Check if user with this email already exists
+            data["created_at"] = "now()"
+            
+            # Insert unless the email already exists (requires a UNIQUE index on email)
+            result = self.supabase.table(settings.SUPABASE_TABLE_NAME).upsert(
+                data, on_conflict="email", ignore_duplicates=True
+            ).execute()
+            
+            # Ignored duplicates return no rows; look up the existing record only then
             email = data.get("email")
-            if email:
+            if not result.data and email:
                 existing = self.supabase.table(settings.SUPABASE_TABLE_NAME).select("*").eq("email", email).execute()
-                
-                if existing.data and len(existing.data) > 0:
+                if existing.data:
                     existing_record = existing.data[0]
                     return {
                         "success": True,
@@ -39,12 +43,6 @@ class DataService:
                         "message": "User data already exists in database"
                     }
             
-            # No existing record found, proceed with insert
-            data["created_at"] = "now()"
-            
-            # Insert into Supabase
-            result = self.supabase.table(settings.SUPABASE_TABLE_NAME).insert(data).execute()
-            
             if result.data:
                 
                 # Send structured output only for new records
@@ -65,6 +63,51 @@ class DataService:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def save_user_data_bulk(self, user_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Save many users in a single upsert (duplicates by email are skipped)"""
+        try:
+            # De-duplicate by email, keeping the last occurrence
+            rows_by_email: Dict[str, Dict[str, Any]] = {}
+            rows_without_email = []
+            for user in user_data:
+                row = {
+                    "name": user.get("name"),
+                    "email": user.get("email"),
+                    "income": user.get("income"),
+                    "created_at": "now()",
+                }
+                if row["email"]:
+                    rows_by_email[row["email"]] = row
+                else:
+                    rows_without_email.append(row)
+            
+            rows = list(rows_by_email.values()) + rows_without_email
+            if not rows:
+                return {"success": True, "inserted": [], "already_exists": []}
+            
+            result = self.supabase.table(settings.SUPABASE_TABLE_NAME).upsert(
+                rows, on_conflict="email", ignore_duplicates=True
+            ).execute()
+            
+            # Ignored duplicates are not returned, so returned rows are the new ones
+            inserted = result.data or []
+            inserted_emails = {row.get("email") for row in inserted}
+            already_exists = [email for email in rows_by_email if email not in inserted_emails]
+            
+            if inserted:
+                try:
+                    self.email_service.send_bulk_user_data(inserted)
+                except Exception as email_error:
+                    logger.warning(f"Failed to send bulk email notification: {email_error}")
+            
+            return {
+                "success": True,
+                "inserted": inserted,
+                "already_exists": already_exists
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
     def get_user_data(self, user_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """Retrieve user data from Supabase"""
         try:
@@ -1,15 +1,71 @@
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
+from collections import OrderedDict
+import hashlib
+import logging
+import threading
 import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from app.core.config import settings
 from app.services.parsers import DocumentParser
 from app.services.embedding_service import EmbeddingService
 from app.services.pinecone_service import PineconeService
+from app.services.semantic_cache import get_semantic_cache
 from app.core.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+CHUNK_SEPARATORS = ["\n\n", "\n", ". ", " "]
+PROGRESS_MIN_INTERVAL = 0.1  # Seconds between forwarded progress updates within one status
+FILE_DIGEST_READ_SIZE = 1024 * 1024  # Bytes read per chunk when hashing uploads
+
+
+def _file_digest(file_path: str) -> str:
+    """Content hash of a file (uploads land in fresh temp files, so path/mtime can't be used)"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        while chunk := f.read(FILE_DIGEST_READ_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _ThrottledProgress:
+    """
+    Thread-safe wrapper that rate-limits a progress callback
+    
+    Updates are forwarded when the status changes, when progress advances
+    by at least one point, when progress reaches 100, or when at least
+    `min_interval` seconds have passed since the last forwarded update.
+    Only near-duplicate updates (same status and progress, e.g. per page or
+    per batch) arriving faster than that are dropped, along with updates
+    that would move progress backwards within a status. The callback runs
+    under the lock so concurrent workers' updates are delivered in order.
+    """
+    
+    def __init__(self, callback, min_interval: float = PROGRESS_MIN_INTERVAL):
+        self.callback = callback
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._last_status = None
+        self._last_progress = None
+        self._last_time = float("-inf")
+    
+    def __call__(self, status: str, message: str, progress: int):
+        now = time.perf_counter()
+        with self._lock:
+            if status == self._last_status:
+                if progress < self._last_progress:
+                    return
+                if (progress < 100 and progress - self._last_progress < 1 and
+                        now - self._last_time < self.min_interval):
+                    return
+            self._last_status = status
+            self._last_progress = progress
+            self._last_time = now
+            self.callback(status, message, progress)
+
 
 class DocumentService:
     """Service for processing and indexing documents"""
@@ -18,140 +74,224 @@ class DocumentService:
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=settings.DOCUMENT_CHUNK_SIZE,
             chunk_overlap=settings.DOCUMENT_CHUNK_OVERLAP,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", " "]
+            length_function=str.__len__,
+            separators=CHUNK_SEPARATORS
         )
         self.parser = DocumentParser()
+        # File extension -> parser dispatch table
+        self._parsers = {
+            '.docx': self.parser.parse_docx,
+            '.doc': self.parser.parse_docx,
+            '.pdf': self.parser.parse_pdf,
+            '.txt': self.parser.parse_txt,
+        }
         self.embedding_service = EmbeddingService()
         self.pinecone_service = PineconeService()
+        # (extension, content digest) -> parsed text, least recently used first
+        self._parse_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._parse_cache_lock = threading.Lock()
+    
+    def warm_up(self):
+        """
+        Load the embedding model and resolve the Pinecone index ahead of the first upload
+        
+        Only the local embedding backend is exercised; for the OpenAI backend a
+        warm-up call would just spend an API request.
+        """
+        if settings.EMBEDDING_BACKEND == "local":
+            self.embedding_service.embeddings.embed_documents(["warmup"])
+        self.pinecone_service.get_index()
     
     def process_document(self, file_path: str, filename: str, progress_callback=None) -> Dict[str, Any]:
         """
         Process uploaded document and store in vector database
         Optimized for speed and accuracy
         """
-        process_start = time.time()
+        # Step timings are only collected when they will actually be logged
+        debug_timing = logger.isEnabledFor(logging.DEBUG)
+        if debug_timing:
+            process_start = time.perf_counter_ns()
+        
+        # Parsers and upsert workers may report per page/batch; forward at a bounded rate
+        if progress_callback:
+            progress_callback = _ThrottledProgress(progress_callback)
         
         try:
-            step_start = time.time()
             if progress_callback:
                 progress_callback("parsing", "Parsing document content...", 10)
             file_ext = Path(filename).suffix.lower()
             
-            parse_start = time.time()
-            if file_ext in ['.docx', '.doc']:
-                content = self.parser.parse_docx(file_path, progress_callback)
-            elif file_ext == '.pdf':
-                content = self.parser.parse_pdf(file_path, progress_callback)
-            elif file_ext == '.txt':
-                content = self.parser.parse_txt(file_path, progress_callback)
-            else:
+            parse_fn = self._parsers.get(file_ext)
+            if parse_fn is None:
                 raise ValueError(f"Unsupported file type: {file_ext}")
-            
-            parse_duration = time.time() - parse_start
+            content = self._parse(parse_fn, file_ext, file_path, progress_callback)
             
             if not content:
                 raise ValueError("No content extracted from document")
             
             content_length = len(content) if isinstance(content, str) else sum(len(chunk.page_content) for chunk in content) if hasattr(content, '__iter__') else 0
-            step_duration = time.time() - step_start
             if progress_callback:
                 progress_callback("parsing", f"Parsed {content_length:,} characters", 20)
+            if debug_timing:
+                parse_end = time.perf_counter_ns()
             
             # STEP 3b: Chunk the document
-            step_start = time.time()
             if progress_callback:
                 progress_callback("chunking", "Chunking document into smaller pieces...", 30)
             
-            chunk_start = time.time()
             if isinstance(content, str):
-                chunks = self.text_splitter.split_text(content)
+                chunks = self._split_text(content)
             else:
                 chunks = [chunk.page_content for chunk in self.text_splitter.split_documents(content)]
-            chunk_duration = time.time() - chunk_start
-            
-            step_duration = time.time() - step_start
-            total_chars = sum(len(chunk) for chunk in chunks)
-            avg_chunk_size = total_chars / len(chunks) if chunks else 0
-            if progress_callback:
-                progress_callback("chunking", f"Created {len(chunks):,} chunks", 40)
             
-            # STEP 3c: Prepare documents for embedding
-            step_start = time.time()
-            if progress_callback:
-                progress_callback("preparing", "Preparing documents for embedding...", 45)
-            
-            prep_start = time.time()
-            documents = []
-            for i, chunk in enumerate(chunks):
-                documents.append({
-                    "text": chunk,
-                    "metadata": {
-                        "filename": filename,
-                        "chunk_index": i,
-                        "total_chunks": len(chunks)
-                    }
-                })
-            prep_duration = time.time() - prep_start
+            # Drop whitespace and tiny fragments; they embed to noise and pollute retrieval
+            chunks = [chunk for chunk in chunks if len(chunk.strip()) >= settings.DOCUMENT_MIN_CHUNK_CHARS]
+            if not chunks:
+                raise ValueError("No content extracted from document")
             
-            step_duration = time.time() - step_start
+            chunk_lengths = np.fromiter(map(len, chunks), dtype=np.int64, count=len(chunks))
+            total_chars = int(chunk_lengths.sum())
             if progress_callback:
-                progress_callback("preparing", f"Prepared {len(documents):,} documents", 50)
+                progress_callback("chunking", f"Created {len(chunks):,} chunks", 40)
+            if debug_timing:
+                chunk_end = time.perf_counter_ns()
             
             # STEP 3d: Get Pinecone index
-            step_start = time.time()
             self.pinecone_service.get_index()
-            step_duration = time.time() - step_start
             if progress_callback:
                 progress_callback("preparing", "Connected to Pinecone", 55)
             
-            # STEP 3e: Generate embeddings
-            step_start = time.time()
-            if progress_callback:
-                progress_callback("embedding", f"Generating embeddings for {len(documents):,} chunks...", 60)
-            
-            texts = [doc["text"] for doc in documents]
-            all_embeddings = self.embedding_service.generate_embeddings(texts)
-            
-            step_duration = time.time() - step_start
+            # STEP 3e-g: Generate embeddings and upsert as a pipeline
             if progress_callback:
-                progress_callback("embedding", f"Generated {len(all_embeddings):,} embeddings", 75)
+                progress_callback("embedding", f"Generating embeddings for {len(chunks):,} chunks...", 60)
             
-            # STEP 3f: Prepare vectors
-            step_start = time.time()
-            vectors = self.pinecone_service.prepare_vectors(documents, all_embeddings, filename)
-            step_duration = time.time() - step_start
+            upserted_count = self._embed_and_upsert(chunks, filename, progress_callback)
+            # Cached RAG context may predate this document
+            get_semantic_cache().clear()
             
-            # STEP 3g: Upsert to Pinecone
-            step_start = time.time()
-            if progress_callback:
-                progress_callback("indexing", f"Indexing {len(vectors):,} vectors...", 80)
-            
-            upserted_count = self.pinecone_service.upsert_vectors(vectors)
-            
-            step_duration = time.time() - step_start
             if progress_callback:
                 progress_callback("indexing", f"Indexed {upserted_count:,} vectors", 100)
             
-            total_duration = time.time() - process_start
+            if debug_timing:
+                index_end = time.perf_counter_ns()
+                logger.debug(
+                    f"Processed {filename}: parse {(parse_end - process_start) / 1e6:.1f} ms, "
+                    f"chunk {(chunk_end - parse_end) / 1e6:.1f} ms, "
+                    f"index {(index_end - chunk_end) / 1e6:.1f} ms"
+                )
             
             return {
                 "success": True,
                 "filename": filename,
-                "chunks_processed": len(documents),
+                "chunks_processed": len(chunks),
                 "total_chars": total_chars
             }
             
         except Exception as e:
-            total_duration = time.time() - process_start
             return {
                 "success": False,
                 "error": str(e)
             }
     
+    def _parse(self, parse_fn, file_ext: str, file_path: str, progress_callback=None):
+        """Run a parser, reusing the result for files whose content was parsed recently"""
+        cache_size = settings.DOCUMENT_PARSE_CACHE_SIZE
+        if cache_size <= 0:
+            return parse_fn(file_path, progress_callback)
+        
+        key = (file_ext, _file_digest(file_path))
+        with self._parse_cache_lock:
+            content = self._parse_cache.get(key)
+            if content is not None:
+                self._parse_cache.move_to_end(key)
+                return content
+        
+        content = parse_fn(file_path, progress_callback)
+        if content:
+            with self._parse_cache_lock:
+                self._parse_cache[key] = content
+                self._parse_cache.move_to_end(key)
+                while len(self._parse_cache) > cache_size:
+                    self._parse_cache.popitem(last=False)
+        return content
+    
+    def _split_text(self, content: str) -> List[str]:
+        """Split text into chunks, skipping the recursive splitter for text that already fits one chunk"""
+        if len(content) <= settings.DOCUMENT_CHUNK_SIZE:
+            stripped = content.strip()
+            return [stripped] if stripped else []
+        return self.text_splitter.split_text(content)
+    
+    def _group_duplicate_chunks(self, chunks: List[str]) -> Tuple[List[str], List[List[int]]]:
+        """Return the distinct chunks and, for each, the indices where it occurs"""
+        index_by_text: Dict[str, int] = {}
+        unique_chunks: List[str] = []
+        occurrences: List[List[int]] = []
+        for i, chunk in enumerate(chunks):
+            unique_index = index_by_text.get(chunk)
+            if unique_index is None:
+                index_by_text[chunk] = len(unique_chunks)
+                unique_chunks.append(chunk)
+                occurrences.append([i])
+            else:
+                occurrences[unique_index].append(i)
+        return unique_chunks, occurrences
+    
+    def _embed_and_upsert(self, chunks: List[str], filename: str, progress_callback=None) -> int:
+        """
+        Embed chunks and upsert them to Pinecone concurrently
+        
+        Each embedding batch is upserted on a background pool as soon as it
+        completes, so network time for Pinecone overlaps with embedding
+        generation. A semaphore bounds the number of batches in flight.
+        """
+        max_workers = settings.DOCUMENT_PINECONE_UPSERT_PARALLEL_WORKERS
+        in_flight = threading.BoundedSemaphore(max_workers * 2)
+        progress_lock = threading.Lock()
+        upserted = {"count": 0}
+        total = len(chunks)
+        
+        def upsert_batch(indices, batch_embeddings):
+            # Vector ids/metadata are built here so that work overlaps with embedding
+            try:
+                vectors = self.pinecone_service.prepare_vectors(chunks, batch_embeddings, filename, chunk_indices=indices)
+                count = self.pinecone_service.upsert_vectors(vectors)
+            finally:
+                in_flight.release()
+            with progress_lock:
+                upserted["count"] += count
+                if progress_callback:
+                    progress = 60 + int(upserted["count"] / total * 39)
+                    progress_callback("indexing", f"Indexed {upserted['count']:,}/{total:,} vectors", progress)
+            return count
+        
+        # Embed each distinct chunk once (repeated headers/footers are common)
+        unique_chunks, occurrences = self._group_duplicate_chunks(chunks)
+        if len(unique_chunks) < total:
+            logger.info(f"Skipping {total - len(unique_chunks):,} duplicate chunks during embedding")
+        
+        upsert_futures = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for unique_indices, unique_embeddings in self.embedding_service.iter_embedding_batches(unique_chunks):
+                # Fan each embedding out to every chunk with the same text
+                indices = []
+                batch_embeddings = []
+                for unique_index, embedding in zip(unique_indices, unique_embeddings):
+                    for chunk_index in occurrences[unique_index]:
+                        indices.append(chunk_index)
+                        batch_embeddings.append(embedding)
+                in_flight.acquire()
+                upsert_futures.append(executor.submit(upsert_batch, indices, batch_embeddings))
+            
+            # Propagate the first upsert error, if any
+            return sum(future.result() for future in as_completed(upsert_futures))
+    
     def delete_document(self, filename: str) -> bool:
         """Delete all chunks for a document"""
-        return self.pinecone_service.delete_by_filename(filename)
+        deleted = self.pinecone_service.delete_by_filename(filename)
+        if deleted:
+            get_semantic_cache().clear()
+        return deleted
     
     def get_document_stats(self) -> Dict[str, Any]:
         """Get statistics about indexed documents"""
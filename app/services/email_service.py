@@ -1,4 +1,4 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import json
 from datetime import datetime
 from app.core.config import settings
@@ -128,7 +128,46 @@ Session: Insomniac Hedge Fund AI Assessment
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def _send_via_sendgrid(self, user_data: Dict[str, Any], text_content: str, html_content: str) -> Dict[str, Any]:
+    def send_bulk_user_data(self, users: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Send a single summary email for several newly saved users"""
+        if not users:
+            return {"success": True, "message": "No users to send"}
+        
+        try:
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")
+            user_lines = "\n".join(
+                f"- {user.get('name', 'Not provided')} <{user.get('email', 'Not provided')}> | Income: {user.get('income', 'Not provided')}"
+                for user in users
+            )
+            text_content = f"""
+AI ENGINEER ASSESSMENT - BULK USER DATA COLLECTED
+
+{len(users)} new user(s) were saved:
+
+{user_lines}
+
+Collection Timestamp: {timestamp}
+
+=== RAW DATA (JSON) ===
+{json.dumps(users, indent=2, default=str)}
+"""
+            html_content = f"<html><body><pre>{text_content}</pre></body></html>"
+            subject = f"AI Assessment - Bulk User Data: {len(users)} user(s)"
+            
+            if self.sendgrid_enabled and self.sendgrid_client:
+                result = self._send_via_sendgrid({}, text_content, html_content, subject=subject)
+                if result.get('success'):
+                    return {"success": True, "message": f"Email sent successfully to {self.recipient_email}", "method": "sendgrid"}
+                error_msg = result.get('error', 'Unknown error')
+                return {"success": False, "message": f"Email delivery failed via SendGrid: {error_msg}", "error": error_msg}
+            
+            self._log_email_content({"name": f"{len(users)} users"}, text_content)
+            return {"success": False, "message": "SendGrid is not available or disabled", "error": "SendGrid not configured"}
+        
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    def _send_via_sendgrid(self, user_data: Dict[str, Any], text_content: str, html_content: str, subject: Optional[str] = None) -> Dict[str, Any]:
         """Send email via SendGrid API"""
         try:            
             if not self.sendgrid_client:
@@ -136,7 +175,7 @@ Session: Insomniac Hedge Fund AI Assessment
             
             from_email = Email(self.email_from, name=self.email_from_name)
             to_email = To(self.recipient_email)
-            subject = f"AI Assessment - User Data: {user_data.get('name', 'Unknown')}"
+            subject = subject or f"AI Assessment - User Data: {user_data.get('name', 'Unknown')}"
             
             message = Mail(
                 from_email=from_email,
@@ -1,59 +1,111 @@
 """Service for generating embeddings"""
-from typing import List
+from typing import Iterator, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from langchain_core.embeddings import Embeddings
 from app.core.config import settings
 from app.core.logging_config import get_logger
 from app.utils.dependencies import get_embeddings
 
 logger = get_logger(__name__)
 
+# Approximate token widths used to group texts of similar length into one batch
+TOKEN_BUCKET_WIDTHS = (16, 32, 64, 128, 256, 512)
+CHARS_PER_TOKEN = 4
+
+
+class LocalEmbeddings(Embeddings):
+    """
+    Embeddings computed in-process with a sentence-transformers model
+    
+    Avoids an HTTPS round trip per batch during ingestion. The model is
+    loaded once and reused; `sentence-transformers` is an optional
+    dependency that is only imported when this backend is selected.
+    """
+    
+    def __init__(self, model_name: str, batch_size: int = 64, device: Optional[str] = None):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "EMBEDDING_BACKEND=local requires the sentence-transformers package"
+            ) from e
+        
+        self.model = SentenceTransformer(model_name, device=device)
+        self.batch_size = batch_size
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of documents"""
+        embeddings = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True
+        )
+        return embeddings.tolist()
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query"""
+        return self.embed_documents([text])[0]
+
 
 class EmbeddingService:
-    """Service for generating embeddings in parallel batches"""
+    """Service for generating embeddings in parallel, length-bucketed batches"""
     
     def __init__(self):
         self.embeddings = get_embeddings()
         self.batch_size = settings.DOCUMENT_EMBEDDING_BATCH_SIZE
     
-    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for texts in parallel batches"""
-        if not texts:
-            return []
+    def _token_bucket(self, text: str) -> Optional[int]:
+        """Return the bucket width for a text (None for texts wider than every bucket)"""
+        approx_tokens = len(text) // CHARS_PER_TOKEN
+        for width in TOKEN_BUCKET_WIDTHS:
+            if approx_tokens <= width:
+                return width
+        return None
+    
+    def _build_batches(self, texts: List[str]) -> List[List[int]]:
+        """
+        Group text indices into batches of similar length
         
-        total_batches = (len(texts) + self.batch_size - 1) // self.batch_size
+        Texts are sorted by length and packed greedily; a batch is closed when
+        it is full or the next text falls into a wider token bucket.
+        """
         batches = []
-        for i in range(0, len(texts), self.batch_size):
-            batches.append((i // self.batch_size + 1, texts[i:i + self.batch_size]))
+        current: List[int] = []
+        current_bucket = None
+        for i in sorted(range(len(texts)), key=lambda i: len(texts[i])):
+            bucket = self._token_bucket(texts[i])
+            if current and (bucket != current_bucket or len(current) >= self.batch_size):
+                batches.append(current)
+                current = []
+            current_bucket = bucket
+            current.append(i)
+        if current:
+            batches.append(current)
+        return batches
+    
+    def iter_embedding_batches(self, texts: List[str]) -> Iterator[Tuple[List[int], List[List[float]]]]:
+        """
+        Generate embeddings in parallel batches, yielding each batch as it completes
         
-        def generate_batch_embeddings(batch_num, batch_texts):
-            try:
-                return batch_num, self.embeddings.embed_documents(batch_texts), None
-            except Exception as e:
-                return batch_num, None, str(e)
+        Yields (text_indices, batch_embeddings) tuples in completion order so
+        callers can start consuming results before all batches are done.
+        """
+        if not texts:
+            return
         
+        batches = self._build_batches(texts)
         max_workers = min(len(batches), settings.DOCUMENT_EMBEDDING_PARALLEL_WORKERS)
-        all_embeddings = []
         
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             future_to_batch = {
-                executor.submit(generate_batch_embeddings, batch_num, batch_texts): batch_num
-                for batch_num, batch_texts in batches
+                executor.submit(self.embeddings.embed_documents, [texts[i] for i in indices]): (batch_num, indices)
+                for batch_num, indices in enumerate(batches, 1)
             }
             
-            batch_results = {}
             for future in as_completed(future_to_batch):
-                batch_num = future_to_batch[future]
+                batch_num, indices = future_to_batch[future]
                 try:
-                    result_batch_num, batch_embeddings, error = future.result()
-                    if error:
-                        raise Exception(f"Batch {result_batch_num} error: {error}")
-                    batch_results[result_batch_num] = batch_embeddings
+                    yield indices, future.result()
                 except Exception as e:
-                    raise
-        
-        # Combine results in order
-        for batch_num in sorted(batch_results.keys()):
-            all_embeddings.extend(batch_results[batch_num])
-        
-        return all_embeddings
-
+                    raise Exception(f"Batch {batch_num} error: {e}")
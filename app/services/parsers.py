@@ -1,21 +1,211 @@
 from docx import Document
 from docx.document import Document as DocxDocument
-from docx.oxml.text.paragraph import CT_P
-from docx.oxml.table import CT_Tbl
-from docx.table import Table
-from docx.text.paragraph import Paragraph
-import pdfplumber
-from typing import List, Optional
-import base64
+from docx.oxml.ns import nsmap, qn
+from lxml import etree
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import io
+import atexit
+import multiprocessing
+import os
+import threading
 import time
 import fitz
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from app.core.config import settings
 from app.core.logging_config import get_logger
-from app.utils.dependencies import get_openai_client
+from app.services.pdf_extraction import extract_pdf_page_range, extract_pdf_pages
+from openai import AsyncOpenAI
+
+try:
+    # SIMD base64; falls back to the stdlib module (same API) when not installed
+    import pybase64 as base64
+except ImportError:
+    import base64
 
 logger = get_logger(__name__)
 
+# WordprocessingML tags, resolved once for direct lxml traversal of DOCX bodies
+P_TAG = qn('w:p')
+TBL_TAG = qn('w:tbl')
+TR_TAG = qn('w:tr')
+TC_TAG = qn('w:tc')
+T_TAG = qn('w:t')
+TAB_TAG = qn('w:tab')
+
+PROGRESS_REPORT_INTERVAL = 0.25  # Seconds between progress reports from per-element loops
+
+# Compiled once; each call runs the whole selection in C
+_WORD_NAMESPACES = {'w': nsmap['w']}
+_BODY_CHILDREN_XP = etree.XPath('./w:p | ./w:tbl', namespaces=_WORD_NAMESPACES)
+# Only the paragraph's own runs: a descendant search would also pick up text
+# boxes, which Word stores twice (mc:Choice and mc:Fallback)
+_RUN_CONTENT_XP = etree.XPath(
+    '(./w:r | ./w:hyperlink/w:r | ./w:ins/w:r)/*[self::w:t or self::w:tab or self::w:br or self::w:cr]',
+    namespaces=_WORD_NAMESPACES
+)
+
+
+def _paragraph_text(p_element) -> str:
+    """Text of a w:p element's direct, hyperlink and inserted runs (text boxes excluded), like python-docx's Paragraph.text"""
+    parts = []
+    for node in _RUN_CONTENT_XP(p_element):
+        tag = node.tag
+        if tag == T_TAG:
+            parts.append(node.text or "")
+        elif tag == TAB_TAG:
+            parts.append("\t")
+        else:
+            parts.append("\n")
+    return "".join(parts)
+
+
+def _image_data_url(image_bytes: bytes, mime_type: str) -> str:
+    """Build a base64 data URL for an image, encoding straight from bytes with a single decode"""
+    return (b"data:" + mime_type.encode("ascii") + b";base64," + base64.b64encode(image_bytes)).decode("ascii")
+
+
+VISION_IMAGE_JPEG_QUALITY = 85
+
+
+def _downscale_image(image_bytes: bytes, mime_type: str) -> Tuple[bytes, str]:
+    """
+    Shrink a large image to the Vision input size and re-encode it as JPEG
+    
+    Small images, and anything Pillow can't open (e.g. EMF/WMF, or Pillow
+    not installed), are returned unchanged.
+    """
+    if len(image_bytes) < settings.DOCUMENT_IMAGE_DOWNSCALE_MIN_BYTES:
+        return image_bytes, mime_type
+    try:
+        from PIL import Image
+        
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            max_dimension = settings.DOCUMENT_IMAGE_MAX_DIMENSION
+            image.thumbnail((max_dimension, max_dimension))
+            buffer = io.BytesIO()
+            image.convert("RGB").save(buffer, "JPEG", quality=VISION_IMAGE_JPEG_QUALITY)
+    except Exception as e:
+        logger.debug(f"Sending image without downscaling: {e}")
+        return image_bytes, mime_type
+    
+    downscaled = buffer.getvalue()
+    if len(downscaled) >= len(image_bytes):
+        return image_bytes, mime_type
+    return downscaled, "image/jpeg"
+
+
+def _vision_image_url(image_bytes: bytes, mime_type: str) -> str:
+    """Downscale (when worthwhile) and encode an image as a data URL for the Vision API"""
+    return _image_data_url(*_downscale_image(image_bytes, mime_type))
+
+
+DOCX_VISION_PROMPT = "Describe this image in detail, including any text, charts, graphs, or data visualizations. Focus on extracting all readable information."
+PDF_VISION_PROMPT = "Describe this image in detail, including any text, charts, graphs, data visualizations, or numerical data. Extract all readable information including axes labels, data points, and trends."
+
+
+async def _describe_images_async(images: List[Tuple[bytes, str]], prompt: str, on_complete: Optional[Callable[[], None]] = None) -> List[Any]:
+    """
+    Describe (image_bytes, mime_type) pairs concurrently, bounded by a semaphore
+    
+    Identical images (e.g. a logo repeated on every page) are described once
+    and the result is shared by every occurrence.
+    """
+    unique_images: List[Tuple[bytes, str]] = []
+    occurrences: List[int] = []
+    unique_index_by_digest: Dict[bytes, int] = {}
+    image_to_unique = []
+    for image_bytes, mime_type in images:
+        digest = hashlib.blake2b(image_bytes, digest_size=16).digest()
+        unique_index = unique_index_by_digest.get(digest)
+        if unique_index is None:
+            unique_index = unique_index_by_digest[digest] = len(unique_images)
+            unique_images.append((image_bytes, mime_type))
+            occurrences.append(0)
+        occurrences[unique_index] += 1
+        image_to_unique.append(unique_index)
+    
+    semaphore = asyncio.Semaphore(settings.DOCUMENT_IMAGE_EXTRACTION_PARALLEL_WORKERS)
+    
+    async with AsyncOpenAI(api_key=settings.OPENAI_API_KEY) as client:
+        async def describe(image_bytes: bytes, mime_type: str, count: int) -> str:
+            try:
+                async with semaphore:
+                    image_url = await asyncio.to_thread(_vision_image_url, image_bytes, mime_type)
+                    response = await client.chat.completions.create(
+                        model=settings.OPENAI_VISION_MODEL,
+                        messages=[
+                            {
+                                "role": "user",
+                                "content": [
+                                    {"type": "text", "text": prompt},
+                                    {"type": "image_url", "image_url": {"url": image_url}}
+                                ]
+                            }
+                        ],
+                        max_tokens=settings.OPENAI_VISION_MAX_TOKENS
+                    )
+                return response.choices[0].message.content
+            finally:
+                if on_complete:
+                    for _ in range(count):
+                        on_complete()
+        
+        results = await asyncio.gather(
+            *(describe(image_bytes, mime_type, count) for (image_bytes, mime_type), count in zip(unique_images, occurrences)),
+            return_exceptions=True
+        )
+    
+    return [results[unique_index] for unique_index in image_to_unique]
+
+
+def _describe_images(images: List[Tuple[bytes, str]], prompt: str, on_complete: Optional[Callable[[], None]] = None) -> List[Any]:
+    """
+    Describe images with OpenAI Vision, with every request in flight on one event loop
+    
+    Parsing runs in a worker thread, so this drives its own loop with a client
+    scoped to it (the shared async client belongs to the server's loop).
+    Returns a description or the raised exception per image, in input order.
+    """
+    return asyncio.run(_describe_images_async(images, prompt, on_complete))
+
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """
+    Get or create the PDF extraction process pool (created on first use, then reused)
+    
+    Spawned workers re-import the launching __main__ module, so starting
+    them costs far more than parsing a few pages; keeping them alive pays
+    that once per server process instead of once per upload.
+    """
+    global _pdf_pool
+    if _pdf_pool is None:
+        with _pdf_pool_lock:
+            if _pdf_pool is None:
+                # Spawn (rather than fork) so workers don't inherit client threads/sockets
+                _pdf_pool = ProcessPoolExecutor(
+                    max_workers=settings.DOCUMENT_PDF_PARSE_WORKERS or os.cpu_count() or 1,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                atexit.register(_pdf_pool.shutdown, wait=False, cancel_futures=True)
+    return _pdf_pool
+
+
+def _reset_pdf_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool so the next large PDF starts a fresh one"""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
 class DocumentParser:
     """
     Parse various document formats and extract:
@@ -33,75 +223,74 @@ class DocumentParser:
         - Images with descriptions (if OpenAI Vision available)
         - Chart/graph references
         """
-        parse_start = time.time()
-        
         try:
             # Load document
             if progress_callback:
                 progress_callback("parsing", "Loading DOCX document...", 10)
-            load_start = time.time()
             doc = Document(file_path)
-            load_duration = time.time() - load_start
             
             content_parts = []
             paragraph_count = 0
             table_count = 0
-            total_elements = len(doc.element.body) if hasattr(doc.element, 'body') else 0
+            body_elements = _BODY_CHILDREN_XP(doc.element.body)
+            total_elements = len(body_elements)
             
             # Process document elements in order (maintains structure)
             if progress_callback:
                 progress_callback("parsing", f"Processing {total_elements} document elements (paragraphs, tables)...", 12)
-            element_start = time.time()
             
-            for idx, element in enumerate(doc.element.body):
-                # Check if it's a paragraph
-                if isinstance(element, CT_P):
-                    paragraph = Paragraph(element, doc)
-                    text = paragraph.text.strip()
+            # Walk the body XML directly instead of wrapping each element in Paragraph/Table
+            last_report = time.monotonic()
+            for idx, element in enumerate(body_elements):
+                tag = element.tag
+                if tag == P_TAG:
+                    text = _paragraph_text(element).strip()
                     if text:
                         content_parts.append(text)
                         paragraph_count += 1
                 
-                # Check if it's a table
-                elif isinstance(element, CT_Tbl):
-                    table = Table(element, doc)
-                    table_data = self._extract_table_data(table)
+                elif tag == TBL_TAG:
+                    table_data = self._extract_table_data(element)
                     if table_data:
                         content_parts.append(f"\n[TABLE]\n{table_data}\n[/TABLE]")
                         table_count += 1
                 
-                # Update progress every 10 elements
-                if progress_callback and (idx + 1) % 10 == 0:
-                    progress = 12 + int((idx + 1) / total_elements * 5) if total_elements > 0 else 12
-                    progress_callback("parsing", f"Processed {idx + 1}/{total_elements} elements ({paragraph_count} paragraphs, {table_count} tables)...", progress)
+                # Report progress by wall clock rather than per element
+                if progress_callback:
+                    now = time.monotonic()
+                    if now - last_report >= PROGRESS_REPORT_INTERVAL:
+                        last_report = now
+                        progress = 12 + int((idx + 1) / total_elements * 5)
+                        progress_callback("parsing", f"Processed {idx + 1}/{total_elements} elements ({paragraph_count} paragraphs, {table_count} tables)...", progress)
             
-            element_duration = time.time() - element_start
+            if progress_callback:
+                progress_callback("parsing", f"Processed {total_elements} elements ({paragraph_count} paragraphs, {table_count} tables)", 17)
             
             # Extract images from document
             if progress_callback:
                 progress_callback("parsing", "Extracting images from document...", 18)
-            image_start = time.time()
             image_descriptions = self._extract_images_from_docx(doc, progress_callback)
-            image_duration = time.time() - image_start
             if image_descriptions:
                 content_parts.append("\n[IMAGES]\n" + "\n".join(image_descriptions) + "\n[/IMAGES]")
             
-            parse_duration = time.time() - parse_start
-            content_length = len("\n\n".join(content_parts))
-            
             return "\n\n".join(content_parts)
             
         except Exception as e:
-            parse_duration = time.time() - parse_start
             raise Exception(f"Error parsing DOCX: {str(e)}")
     
-    def _extract_table_data(self, table: Table) -> str:
-        """Extract structured data from table"""
+    def _extract_table_data(self, table) -> str:
+        """
+        Extract structured data from a table (python-docx Table or raw w:tbl element)
+        
+        Rows and cells are read straight from the XML in one pass; going through
+        Table.rows / cell.text re-scans the table for every cell.
+        """
+        table_element = getattr(table, '_tbl', table)
         table_data = []
-        for row in table.rows:
+        for row in table_element.iterchildren(TR_TAG):
             row_data = []
-            for cell in row.cells:
-                cell_text = cell.text.strip()
+            for cell in row.iterchildren(TC_TAG):
+                cell_text = "\n".join(_paragraph_text(p) for p in cell.iterchildren(P_TAG)).strip()
                 if cell_text:
                     row_data.append(cell_text)
             if row_data:
@@ -109,23 +298,21 @@ class DocumentParser:
         return "\n".join(table_data)
     
     def _extract_images_from_docx(self, doc: DocxDocument, progress_callback=None) -> List[str]:
-        """Extract images from DOCX and generate descriptions in parallel"""
+        """Extract images from DOCX and generate descriptions concurrently"""
         image_descriptions = []
+        image_count = 0
         
-        try:            
+        try:
             # First, collect all images
             if progress_callback:
                 progress_callback("parsing", "Scanning document for images...", 18)
             image_data_list = []
-            image_count = 0
             for rel in doc.part.rels.values():
                 if "image" in rel.target_ref:
                     image_count += 1
                     try:
                         image_part = rel.target_part
-                        image_bytes = image_part.blob
-                        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
-                        image_data_list.append((image_count, image_base64))
+                        image_data_list.append((image_count, image_part.blob, image_part.content_type))
                     except Exception as e:
                         image_descriptions.append(f"Image {image_count}: [Error extracting image: {str(e)}]")
             
@@ -137,71 +324,27 @@ class DocumentParser:
             if progress_callback:
                 progress_callback("parsing", f"Found {len(image_data_list)} images, analyzing with AI...", 18)
             
-            # Function to process a single image
-            def process_image(image_num, image_base64):
-                image_start = time.time()
-                try:
-                    client = get_openai_client()
-                    response = client.chat.completions.create(
-                        model=settings.OPENAI_VISION_MODEL,
-                        messages=[
-                            {
-                                "role": "user",
-                                "content": [
-                                    {
-                                        "type": "text",
-                                        "text": "Describe this image in detail, including any text, charts, graphs, or data visualizations. Focus on extracting all readable information."
-                                    },
-                                    {
-                                        "type": "image_url",
-                                        "image_url": {
-                                            "url": f"data:image/jpeg;base64,{image_base64}"
-                                        }
-                                    }
-                                ]
-                            }
-                        ],
-                        max_tokens=settings.OPENAI_VISION_MAX_TOKENS
-                    )
-                    description = response.choices[0].message.content
-                    image_duration = time.time() - image_start
-                    return image_num, f"Image {image_num}: {description}", None
-                except Exception as e:
-                    image_duration = time.time() - image_start
-                    return image_num, f"Image {image_num}: [Error processing image: {str(e)}]", str(e)
+            completed_count = 0
             
-            # Process images in parallel
-            max_workers = min(len(image_data_list), settings.DOCUMENT_IMAGE_EXTRACTION_PARALLEL_WORKERS)
-            
-            parallel_start = time.time()
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # Submit all image processing tasks
-                future_to_image = {
-                    executor.submit(process_image, image_num, image_base64): image_num
-                    for image_num, image_base64 in image_data_list
-                }
-                
-                # Collect results as they complete
-                image_results = {}
-                completed_count = 0
-                for future in as_completed(future_to_image):
-                    image_num = future_to_image[future]
-                    try:
-                        result_image_num, description, error = future.result()
-                        image_results[result_image_num] = description
-                        completed_count += 1
-                        if progress_callback:
-                            progress = 18 + int((completed_count / len(image_data_list)) * 1)
-                            progress_callback("parsing", f"Analyzed image {completed_count}/{len(image_data_list)} with AI...", progress)
-                    except Exception as e:
-                        image_results[image_num] = f"Image {image_num}: [Error: {str(e)}]"
-                        completed_count += 1
+            def on_complete():
+                nonlocal completed_count
+                completed_count += 1
+                if progress_callback:
+                    progress = 18 + int((completed_count / len(image_data_list)) * 1)
+                    progress_callback("parsing", f"Analyzed image {completed_count}/{len(image_data_list)} with AI...", progress)
             
-            parallel_duration = time.time() - parallel_start
+            results = _describe_images(
+                [(image_bytes, mime_type) for _, image_bytes, mime_type in image_data_list],
+                DOCX_VISION_PROMPT,
+                on_complete
+            )
             
-            # Combine results in order
-            for image_num in sorted(image_results.keys()):
-                image_descriptions.append(image_results[image_num])
+            # Results come back in input order
+            for (image_num, _, _), result in zip(image_data_list, results):
+                if isinstance(result, Exception):
+                    image_descriptions.append(f"Image {image_num}: [Error processing image: {str(result)}]")
+                else:
+                    image_descriptions.append(f"Image {image_num}: {result}")
             
         except Exception as e:
             if image_count > 0:
@@ -209,218 +352,165 @@ class DocumentParser:
         
         return image_descriptions
     
-    def parse_pdf(self, file_path: str, progress_callback=None) -> str:
+    def parse_pdf(self, file_path: str, progress_callback=None, workers: Optional[int] = None) -> str:
         """
         Parse PDF file and extract:
         - Text from pages
         - Tables with structured data
         - Images with descriptions (if OpenAI Vision available)
         - Chart/graph data where possible
-        """
-        parse_start = time.time()
         
+        Text and table extraction is CPU-bound, so PDFs of at least
+        DOCUMENT_PDF_PARALLEL_MIN_PAGES pages are split into `workers` page
+        ranges (defaults to DOCUMENT_PDF_PARSE_WORKERS, or the CPU count when
+        that is 0) and extracted on the shared process pool.
+        """
         try:
             # Open PDF
             if progress_callback:
                 progress_callback("parsing", "Opening PDF file...", 10)
-            open_start = time.time()
-            pdf = pdfplumber.open(file_path)
-            open_duration = time.time() - open_start
-            
-            content_parts = []
-            total_pages = len(pdf.pages)
-            total_tables = 0
-            total_images = 0
-            
-            if progress_callback:
-                progress_callback("parsing", f"Processing {total_pages} pages...", 12)
-            
-            page_start = time.time()
-            for page_num, page in enumerate(pdf.pages):
-                if progress_callback:
-                    progress = 12 + int((page_num / total_pages) * 5) if total_pages > 0 else 12
-                    progress_callback("parsing", f"Processing page {page_num + 1}/{total_pages}...", progress)
-                page_content = []
-                
-                # Extract text
-                text_start = time.time()
-                text = page.extract_text()
-                text_duration = time.time() - text_start
-                if text:
-                    page_content.append(text)
-                
-                # Extract tables
-                table_start = time.time()
-                tables = page.extract_tables()
-                table_duration = time.time() - table_start
-                for table_num, table in enumerate(tables):
-                    if table:
-                        table_text = []
-                        for row in table:
-                            if row:
-                                row_text = " | ".join([
-                                    str(cell) if cell else "" 
-                                    for cell in row
-                                ])
-                                table_text.append(row_text)
-                        
-                        if table_text:
-                            page_content.append(
-                                f"\n[TABLE {table_num + 1}]\n" + 
-                                "\n".join(table_text) + 
-                                "\n[/TABLE]"
-                            )
-                            total_tables += 1
+            # One handle serves the page count, in-process extraction and images
+            with fitz.open(file_path) as doc:
+                total_pages = doc.page_count
                 
+                if progress_callback:
+                    progress_callback("parsing", f"Processing {total_pages} pages...", 12)
                 
-                # Extract images from page
-                image_start = time.time()
-                try:
-                    images = page.images
-                    if images:
-                        if progress_callback:
-                            progress_callback("parsing", f"Extracting images from page {page_num + 1}/{total_pages}...", 17)
-                        image_descriptions = self._extract_images_from_pdf_page(pdf, page_num, images, progress_callback)
-                        if image_descriptions:
-                            page_content.append("\n[IMAGES]\n" + "\n".join(image_descriptions) + "\n[/IMAGES]")
-                            total_images += len(image_descriptions)
-                except Exception as img_error:
-                    # Image extraction is optional, continue if it fails
-                    logger.debug(f"Page {page_num + 1}: Image extraction skipped: {str(img_error)}")
+                workers = workers or settings.DOCUMENT_PDF_PARSE_WORKERS or os.cpu_count() or 1
+                workers = min(workers, total_pages)
+                if workers > 1 and total_pages >= settings.DOCUMENT_PDF_PARALLEL_MIN_PAGES:
+                    pages = self._extract_pdf_pages_parallel(file_path, total_pages, workers, progress_callback)
+                    if pages is None:
+                        pages = extract_pdf_pages(doc, 0, total_pages)
+                else:
+                    pages = extract_pdf_pages(doc, 0, total_pages)
                 
-                image_duration = time.time() - image_start
+                # Describe images from every page in one concurrent batch
+                image_pages = [(page_num, image_info) for page_num, _, image_info in pages if image_info]
+                if image_pages:
+                    if progress_callback:
+                        progress_callback("parsing", f"Extracting images from {len(image_pages)} pages...", 17)
+                    images_by_page = self._extract_images_from_pdf(doc, image_pages, progress_callback)
+                else:
+                    images_by_page = {}
+            
+            content_parts = []
+            for page_num, page_content, _ in pages:
+                image_descriptions = images_by_page.get(page_num)
+                if image_descriptions:
+                    page_content.append("\n[IMAGES]\n" + "\n".join(image_descriptions) + "\n[/IMAGES]")
                 
                 if page_content:
                     content_parts.append(f"\n--- Page {page_num + 1} ---\n" + "\n".join(page_content))
             
-            page_duration = time.time() - page_start
-            pdf.close()
-            
-            parse_duration = time.time() - parse_start
-            content_length = len("\n\n".join(content_parts))
-            
             return "\n\n".join(content_parts)
             
         except Exception as e:
-            parse_duration = time.time() - parse_start
             raise Exception(f"Error parsing PDF: {str(e)}")
     
-    def _extract_images_from_pdf_page(self, pdf, page_num: int, images: List, progress_callback=None) -> List[str]:
-        """Extract and describe images from PDF page using PyMuPDF or pdfplumber in parallel"""
-        image_descriptions = []
+    def _extract_pdf_pages_parallel(self, file_path: str, total_pages: int, workers: int, progress_callback=None) -> Optional[List[Tuple[int, List[str], List[Dict[str, Any]]]]]:
+        """
+        Extract text and tables from page ranges on the process pool, returning pages in order
         
+        Returns None if the pool broke (e.g. a worker was killed) so the
+        caller can fall back to in-process extraction.
+        """
+        pages_per_worker = (total_pages + workers - 1) // workers
+        ranges = [(start, min(start + pages_per_worker, total_pages)) for start in range(0, total_pages, pages_per_worker)]
+        
+        pool = _get_pdf_pool()
+        pages = []
         try:
-            # First, collect all images from the page
-            image_data_list = []
+            futures = [pool.submit(extract_pdf_page_range, file_path, start, end) for start, end in ranges]
+            for completed, future in enumerate(as_completed(futures), 1):
+                pages.extend(future.result())
+                if progress_callback:
+                    progress = 12 + int(completed / len(ranges) * 5)
+                    progress_callback("parsing", f"Processed {len(pages)}/{total_pages} pages...", progress)
+        except BrokenProcessPool as e:
+            logger.warning(f"PDF worker pool failed, extracting in-process: {e}")
+            _reset_pdf_pool(pool)
+            return None
         
+        pages.sort(key=lambda page: page[0])
+        return pages
+    
+    def _extract_images_from_pdf(self, doc: fitz.Document, image_pages: List[Tuple[int, List[Dict[str, Any]]]], progress_callback=None) -> Dict[int, List[str]]:
+        """
+        Extract and describe images for the given (page_num, image_info) pages
+        
+        Images are read through the caller's open PyMuPDF document and all are
+        described in a single concurrent batch, so Vision concurrency is
+        bounded globally rather than per page. Returns descriptions keyed by page number.
+        """
+        descriptions_by_page: Dict[int, List[str]] = {}
+        image_data_list = []  # (page_num, img_num, image_bytes, mime_type)
+        extracted_by_xref: Dict[int, Dict[str, Any]] = {}
+        
+        for page_num, images in image_pages:
+            page_descriptions = descriptions_by_page.setdefault(page_num, [])
             try:
-                doc = fitz.open(pdf.path if hasattr(pdf, 'path') else pdf)
-                page = doc[page_num]
-                image_list = page.get_images()
-                
-                for img_num, img in enumerate(image_list):
-                    try:
-                        # Get image bytes
-                        xref = img[0]
-                        base_image = doc.extract_image(xref)
-                        image_bytes = base_image["image"]
-                        image_ext = base_image.get('ext', 'png')
-                        
-                        # Convert to base64
-                        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
-                        image_data_list.append((img_num + 1, image_base64, image_ext))
-                    except Exception as e:
-                        image_descriptions.append(f"Image {img_num + 1} (Page {page_num + 1}): [Error extracting: {str(e)}]")
-                
-                doc.close()
-                
-                if image_data_list:
-                    # Process images in parallel
-                    if progress_callback:
-                        progress_callback("parsing", f"Analyzing {len(image_data_list)} images from page {page_num + 1} with AI...", 18)
-                    
-                    # Function to process a single image
-                    def process_pdf_image(img_num, image_base64, image_ext, page_num):
-                        image_start = time.time()
-                        try:
-                            client = get_openai_client()
-                            response = client.chat.completions.create(
-                                model=settings.OPENAI_VISION_MODEL,
-                                messages=[
-                                    {
-                                        "role": "user",
-                                        "content": [
-                                            {
-                                                "type": "text",
-                                                "text": "Describe this image in detail, including any text, charts, graphs, data visualizations, or numerical data. Extract all readable information including axes labels, data points, and trends."
-                                            },
-                                            {
-                                                "type": "image_url",
-                                                "image_url": {
-                                                    "url": f"data:image/{image_ext};base64,{image_base64}"
-                                                }
-                                            }
-                                        ]
-                                    }
-                                ],
-                                max_tokens=settings.OPENAI_VISION_MAX_TOKENS
-                            )
-                            description = response.choices[0].message.content
-                            image_duration = time.time() - image_start
-                            return img_num, f"Image {img_num} (Page {page_num + 1}): {description}", None
-                        except Exception as e:
-                            image_duration = time.time() - image_start
-                            return img_num, f"Image {img_num} (Page {page_num + 1}): [Error processing: {str(e)}]", str(e)
-                    
-                    # Process images in parallel
-                    max_workers = min(len(image_data_list), settings.DOCUMENT_IMAGE_EXTRACTION_PARALLEL_WORKERS)
-                    
-                    parallel_start = time.time()
-                    completed_count = 0
-                    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                        # Submit all image processing tasks
-                        future_to_image = {
-                            executor.submit(process_pdf_image, img_num, image_base64, image_ext, page_num): img_num
-                            for img_num, image_base64, image_ext in image_data_list
-                        }
-                        
-                        # Collect results as they complete
-                        image_results = {}
-                        for future in as_completed(future_to_image):
-                            img_num = future_to_image[future]
-                            try:
-                                result_img_num, description, error = future.result()
-                                image_results[result_img_num] = description
-                                completed_count += 1
-                                if progress_callback:
-                                    progress = 18 + int((completed_count / len(image_data_list)) * 1)
-                                    progress_callback("parsing", f"Analyzed image {completed_count}/{len(image_data_list)} from page {page_num + 1}...", progress)
-                            except Exception as e:
-                                image_results[img_num] = f"Image {img_num} (Page {page_num + 1}): [Error: {str(e)}]"
-                                completed_count += 1
-                    
-                    parallel_duration = time.time() - parallel_start
-                    
-                    # Combine results in order
-                    for img_num in sorted(image_results.keys()):
-                        image_descriptions.append(image_results[img_num])
-                    
-                    return image_descriptions
+                image_list = doc[page_num].get_images()
             except Exception as e:
-                # Fallback if PyMuPDF extraction fails
-                raise Exception(f"Error extracting images from PDF page {page_num + 1}: {str(e)}")
+                page_descriptions.append(f"[Image extraction error on page {page_num + 1}: {str(e)}]")
+                continue
             
-            # Fallback: Use pdfplumber image coordinates (less accurate)
-            for img_num, img_info in enumerate(images):
-                image_descriptions.append(
-                    f"Image {img_num + 1} on page {page_num + 1}: "
-                    f"[Image detected at coordinates: x0={img_info.get('x0', 'N/A')}, y0={img_info.get('y0', 'N/A')}]"
-                )
+            extracted = 0
+            for img_num, img in enumerate(image_list):
+                try:
+                    # Get image bytes (an image object shared across pages is extracted once)
+                    xref = img[0]
+                    base_image = extracted_by_xref.get(xref)
+                    if base_image is None:
+                        base_image = extracted_by_xref[xref] = doc.extract_image(xref)
+                    image_ext = base_image.get('ext', 'png')
+                    image_data_list.append((page_num, img_num + 1, base_image["image"], f"image/{image_ext}"))
+                    extracted += 1
+                except Exception as e:
+                    page_descriptions.append(f"Image {img_num + 1} (Page {page_num + 1}): [Error extracting: {str(e)}]")
+            
+            if not extracted:
+                # Fallback: Use image placement coordinates (less accurate)
+                for img_num, img_info in enumerate(images):
+                    page_descriptions.append(
+                        f"Image {img_num + 1} on page {page_num + 1}: "
+                        f"[Image detected at coordinates: x0={img_info.get('x0', 'N/A')}, y0={img_info.get('y0', 'N/A')}]"
+                    )
         
+        if not image_data_list:
+            return descriptions_by_page
+        
+        if progress_callback:
+            progress_callback("parsing", f"Analyzing {len(image_data_list)} images with AI...", 18)
+        
+        completed_count = 0
+        
+        def on_complete():
+            nonlocal completed_count
+            completed_count += 1
+            if progress_callback:
+                progress = 18 + int((completed_count / len(image_data_list)) * 1)
+                progress_callback("parsing", f"Analyzed image {completed_count}/{len(image_data_list)}...", progress)
+        
+        try:
+            results = _describe_images(
+                [(image_bytes, mime_type) for _, _, image_bytes, mime_type in image_data_list],
+                PDF_VISION_PROMPT,
+                on_complete
+            )
         except Exception as e:
-            image_descriptions.append(f"[Image extraction error on page {page_num + 1}: {str(e)}]")
+            for page_num in {page_num for page_num, _, _, _ in image_data_list}:
+                descriptions_by_page[page_num].append(f"[Image extraction error on page {page_num + 1}: {str(e)}]")
+            return descriptions_by_page
         
-        return image_descriptions
+        # Results come back in input order, which is page then image order
+        for (page_num, img_num, _, _), result in zip(image_data_list, results):
+            if isinstance(result, Exception):
+                descriptions_by_page[page_num].append(f"Image {img_num} (Page {page_num + 1}): [Error processing: {str(result)}]")
+            else:
+                descriptions_by_page[page_num].append(f"Image {img_num} (Page {page_num + 1}): {result}")
+        
+        return descriptions_by_page
     
     def parse_txt(self, file_path: str, progress_callback=None) -> str:
         """Parse TXT file"""
@@ -0,0 +1,55 @@
+"""
+PDF page extraction run in parser worker processes
+
+Kept free of app imports (settings, logging, API clients) so spawned
+workers only load PyMuPDF when they unpickle these functions.
+"""
+from typing import Any, Dict, List, Tuple
+import fitz
+
+
+def extract_pdf_page_range(file_path: str, start: int, end: int) -> List[Tuple[int, List[str], List[Dict[str, Any]]]]:
+    """
+    Extract text and tables for pages [start, end) of a PDF
+    
+    Runs in a worker process. Returns (page_num, page_content, image_info)
+    per page, where image_info holds the picklable coordinates of any images
+    on the page.
+    """
+    with fitz.open(file_path) as doc:
+        return extract_pdf_pages(doc, start, end)
+
+
+def extract_pdf_pages(doc: fitz.Document, start: int, end: int) -> List[Tuple[int, List[str], List[Dict[str, Any]]]]:
+    """Extract text and tables for pages [start, end) of an already open PDF"""
+    pages = []
+    for page_num in range(start, end):
+        page = doc[page_num]
+        page_content = []
+        
+        # Extract text
+        text = page.get_text("text").strip()
+        if text:
+            page_content.append(text)
+        
+        # Extract tables
+        for table_num, table in enumerate(page.find_tables().tables):
+            table_text = []
+            for row in table.extract():
+                if row:
+                    row_text = " | ".join([
+                        str(cell) if cell else ""
+                        for cell in row
+                    ])
+                    table_text.append(row_text)
+            
+            if table_text:
+                page_content.append(
+                    f"\n[TABLE {table_num + 1}]\n" + 
+                    "\n".join(table_text) + 
+                    "\n[/TABLE]"
+                )
+        
+        image_info = [{"x0": info["bbox"][0], "y0": info["bbox"][1]} for info in page.get_image_info()]
+        pages.append((page_num, page_content, image_info))
+    return pages
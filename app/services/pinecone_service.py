@@ -1,6 +1,7 @@
 """Service for Pinecone vector database operations"""
-from typing import List, Dict, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Sequence
+import hashlib
+import threading
 from app.core.config import settings
 from app.core.logging_config import get_logger
 from app.utils.dependencies import get_pinecone_client
@@ -9,20 +10,50 @@ import pinecone
 logger = get_logger(__name__)
 
 
+def _text_digest(text: str) -> str:
+    """Stable 64-bit hex digest of a chunk (builtin hash() is salted per process)"""
+    return hashlib.blake2b(text.encode("utf-8", "ignore"), digest_size=8).hexdigest()
+
+
+def _chunk_metadata(text: str, filename: str, chunk_index: int, total_chunks: int) -> Dict[str, Any]:
+    """Build the Pinecone metadata for a single chunk"""
+    return {
+        "text": text,
+        "filename": filename,
+        "chunk_index": chunk_index,
+        "total_chunks": total_chunks
+    }
+
+
 class PineconeService:
     """Service for Pinecone vector database operations"""
     
     def __init__(self):
         self.pinecone_client = get_pinecone_client()
-        self.batch_size = settings.PINECONE_BATCH_SIZE
+        self.use_grpc = settings.PINECONE_USE_GRPC and self.pinecone_client is not None
+        self.batch_size = settings.PINECONE_GRPC_BATCH_SIZE if self.use_grpc else settings.PINECONE_BATCH_SIZE
+        self._index = None
+        self._index_lock = threading.Lock()
     
     def get_index(self):
-        """Get or create Pinecone index"""
+        """Get or create Pinecone index (resolved once per service and cached)"""
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    self._index = self._resolve_index()
+        return self._index
+    
+    def _resolve_index(self):
+        """Look up the Pinecone index, creating it if it doesn't exist"""
         index_name = settings.PINECONE_INDEX_NAME
         
         if self.pinecone_client:
+            # Keep a pooled keep-alive connection per concurrent upsert worker (REST client only)
+            index_kwargs = {} if self.use_grpc else {
+                "connection_pool_maxsize": settings.DOCUMENT_PINECONE_UPSERT_PARALLEL_WORKERS
+            }
             try:
-                return self.pinecone_client.Index(index_name)
+                return self.pinecone_client.Index(index_name, **index_kwargs)
             except Exception:
                 try:
                     self.pinecone_client.create_index(
@@ -30,7 +61,7 @@ class PineconeService:
                         dimension=1536,
                         metric="cosine"
                     )
-                    return self.pinecone_client.Index(index_name)
+                    return self.pinecone_client.Index(index_name, **index_kwargs)
                 except Exception as e:
                     raise Exception(f"Failed to create/get index: {e}")
         else:
@@ -42,23 +73,32 @@ class PineconeService:
                 )
             return pinecone.Index(index_name)
     
-    def prepare_vectors(self, documents: List[Dict[str, Any]], embeddings: List[List[float]], filename: str) -> List[Dict[str, Any]]:
-        """Prepare vectors for Pinecone upsert"""
-        vectors = []
-        for i, (doc, embedding) in enumerate(zip(documents, embeddings)):
-            vector_id = f"{filename}_{i}_{hash(doc['text'])}"
-            vectors.append({
-                "id": vector_id,
+    def prepare_vectors(self, chunks: List[str], embeddings: Sequence[Sequence[float]], filename: str, chunk_indices: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """
+        Prepare vectors for Pinecone upsert
+        
+        `embeddings[j]` belongs to `chunks[chunk_indices[j]]`; when
+        `chunk_indices` is omitted embeddings line up with `chunks`.
+        """
+        if chunk_indices is None:
+            chunk_indices = range(len(embeddings))
+        total_chunks = len(chunks)
+        return [
+            {
+                "id": f"{filename}_{i}_{_text_digest(chunks[i])}",
                 "values": embedding,
-                "metadata": {
-                    "text": doc["text"],
-                    **doc["metadata"]
-                }
-            })
-        return vectors
+                "metadata": _chunk_metadata(chunks[i], filename, i, total_chunks)
+            }
+            for i, embedding in zip(chunk_indices, embeddings)
+        ]
     
     def upsert_vectors(self, vectors: List[Dict[str, Any]]) -> int:
-        """Upsert vectors to Pinecone in parallel batches"""
+        """
+        Upsert vectors to Pinecone in batches on the calling thread
+        
+        Callers (DocumentService._embed_and_upsert) already run upserts on
+        their own worker pool, so batches are not fanned out again here.
+        """
         if not vectors:
             return 0
         
@@ -73,35 +113,35 @@ class PineconeService:
         
         total_batches = len(vector_batches)
         
-        def upsert_batch(batch_num, batch_vectors):
+        if self.use_grpc:
+            return self._upsert_batches_grpc(index, vector_batches)
+        
+        upserted_count = 0
+        for batch_num, batch_vectors in vector_batches:
             try:
                 logger.debug(f"Upserting batch {batch_num}/{total_batches} ({len(batch_vectors)} vectors)")
                 index.upsert(vectors=batch_vectors)
-                return batch_num, len(batch_vectors), None
             except Exception as e:
                 logger.error(f"Batch {batch_num} upsert failed: {str(e)}")
-                return batch_num, 0, str(e)
+                raise Exception(f"Batch {batch_num} upsert error: {e}")
+            upserted_count += len(batch_vectors)
         
-        max_workers = min(total_batches, settings.DOCUMENT_PINECONE_UPSERT_PARALLEL_WORKERS)
+        return upserted_count
+    
+    def _upsert_batches_grpc(self, index, vector_batches: List[tuple]) -> int:
+        """Issue every batch as an async gRPC request, then wait for them in order"""
+        futures = [
+            (batch_num, len(batch_vectors), index.upsert(vectors=batch_vectors, async_req=True))
+            for batch_num, batch_vectors in vector_batches
+        ]
         upserted_count = 0
-        
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_batch = {
-                executor.submit(upsert_batch, batch_num, batch_vectors): batch_num
-                for batch_num, batch_vectors in vector_batches
-            }
-            
-            for future in as_completed(future_to_batch):
-                batch_num = future_to_batch[future]
-                try:
-                    result_batch_num, count, error = future.result()
-                    if error:
-                        raise Exception(f"Batch {result_batch_num} upsert error: {error}")
-                    upserted_count += count
-                except Exception as e:
-                    logger.error(f"Failed to get result for batch {batch_num}: {str(e)}")
-                    raise
-        
+        for batch_num, count, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Batch {batch_num} upsert failed: {str(e)}")
+                raise Exception(f"Batch {batch_num} upsert error: {e}")
+            upserted_count += count
         return upserted_count
     
     def delete_by_filename(self, filename: str) -> bool:
@@ -1,14 +1,219 @@
 """RAG (Retrieval-Augmented Generation) service for document retrieval"""
-from typing import List, Dict, Any, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+import asyncio
+import atexit
+import logging
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from itertools import chain
 from app.core.config import settings
 from app.core.logging_config import get_logger
-from app.utils.dependencies import get_vector_store, get_openai_client
+from app.utils.dependencies import get_vector_store, get_openai_client, get_async_openai_client, get_embeddings
+from app.services.semantic_cache import get_semantic_cache
+from app.utils.cache import TTLCache
 from app.utils.prompts import get_query_generation_prompt, build_rag_context
-import json
+import orjson
+import re
 
 logger = get_logger(__name__)
 
+# Markdown code fence (optionally tagged json) wrapping a model's JSON reply
+_JSON_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL)
+# Complete JSON string literal, used to salvage queries from a truncated array
+_JSON_STRING_RE = re.compile(r'"(?:[^"\\]|\\.)*"')
+
+# Generated queries per normalized message, shared by every RAGService
+_search_query_cache = TTLCache(settings.RAG_QUERY_CACHE_MAX_SIZE, settings.RAG_QUERY_CACHE_TTL)
+_answer_query_cache = TTLCache(settings.RAG_QUERY_CACHE_MAX_SIZE, settings.RAG_QUERY_CACHE_TTL)
+
+
+def _query_cache_key(message: str) -> str:
+    """Normalize a message so trivially different phrasings share cached queries"""
+    return message.strip().lower()
+
+
+def _answer_focused_query_request(message: str) -> Dict[str, Any]:
+    """Chat completion arguments for generating answer-focused search queries"""
+    prompt = f"""Given this question: "{message}"
+
+Think about what the SPECIFIC ANSWER might be in a document. Generate 5-8 search queries that directly target potential answer terms and concepts that would appear in the document's answer.
+
+For example:
+- Question: "What is the only good information about the stock?" 
+- Answer queries: ["insider information", "insider knowledge", "insiders know", "insiders know better", "insider trading information", "what insiders know about stock"]
+
+- Question: "What are the best technical indicators?"
+- Answer queries: ["support resistance", "moving average", "MA 50", "MA 200", "divergence", "technical indicators support resistance", "best indicators moving average"]
+
+Generate queries that search for the ANSWER TERMS, not just the question terms.
+
+Return ONLY a JSON object with the search query strings:
+{{"queries": ["query1", "query2", "query3", ...]}}"""
+    
+    return {
+        "model": settings.OPENAI_QUERY_GEN_MODEL,
+        "messages": [
+            {
+                "role": "system", 
+                "content": "You are an expert at predicting document answers and generating search queries for those answers."
+            },
+            {
+                "role": "user", 
+                "content": prompt
+            }
+        ],
+        "temperature": 0.5,  # Slightly higher for more creative answer predictions
+        "max_tokens": 300,
+        "response_format": {"type": "json_object"}
+    }
+
+
+def _search_query_request(message: str) -> Dict[str, Any]:
+    """Chat completion arguments for generating question-based search queries"""
+    return {
+        "model": settings.OPENAI_QUERY_GEN_MODEL,
+        "messages": [
+            {
+                "role": "system", 
+                "content": "You are a search query optimization assistant. Generate diverse search queries to improve document retrieval."
+            },
+            {
+                "role": "user", 
+                "content": get_query_generation_prompt(message)
+            }
+        ],
+        "temperature": settings.OPENAI_QUERY_GEN_TEMPERATURE,
+        "max_tokens": settings.OPENAI_QUERY_GEN_MAX_TOKENS,
+        "response_format": {"type": "json_object"}
+    }
+
+
+def _parse_query_list(response) -> Any:
+    """
+    Parse the query list from a JSON-mode completion ({"queries": [...]})
+    
+    A bare array and markdown code fences are still accepted, and queries
+    are salvaged from replies truncated by max_tokens.
+    """
+    query_text = response.choices[0].message.content
+    fence = _JSON_FENCE_RE.match(query_text)
+    query_text = fence.group(1) if fence else query_text.strip()
+    
+    try:
+        parsed = orjson.loads(query_text)
+        return parsed.get("queries") if isinstance(parsed, dict) else parsed
+    except orjson.JSONDecodeError:
+        if not settings.RAG_JSON_RECOVERY:
+            raise
+        queries = _salvage_query_list(query_text)
+        if not queries:
+            raise
+        logger.warning(f"Recovered {len(queries)} queries from malformed query JSON")
+        return queries
+
+
+def _salvage_query_list(query_text: str) -> List[str]:
+    """
+    Extract the complete string items from a malformed or truncated JSON array
+    
+    Completions cut off by max_tokens usually end mid-item; every string
+    literal before that point is still usable.
+    """
+    start = query_text.find("[")
+    if start < 0:
+        return []
+    queries = []
+    for literal in _JSON_STRING_RE.findall(query_text, start):
+        try:
+            queries.append(orjson.loads(literal))
+        except orjson.JSONDecodeError:
+            continue
+    return queries
+
+
+def _valid_answer_queries(answer_queries: Any) -> List[str]:
+    """Keep non-trivial string queries from a parsed answer-query list"""
+    if isinstance(answer_queries, list):
+        return [q.strip() for q in answer_queries if isinstance(q, str) and len(q.strip()) > 2]
+    return []
+
+
+def _valid_search_queries(search_queries: Any, message: str) -> List[str]:
+    """Keep non-trivial string queries, falling back to the original message"""
+    if isinstance(search_queries, list):
+        valid_queries = [q.strip() for q in search_queries if isinstance(q, str) and len(q.strip()) > 2]
+        if not valid_queries:
+            return [message]
+        # Return up to 12 queries for better semantic coverage
+        return valid_queries[:12]
+    return [message]
+
+
+class _HedgedCall:
+    """
+    A fallback call submitted to an executor once `delay` seconds have passed
+    
+    No timer thread is used: the thread driving the primary path calls
+    poll() whenever it wakes (bounding its waits with timeout()), and the
+    call is submitted then if the deadline has passed. result() submits it
+    immediately. A negative delay means it only starts via result().
+    """
+    
+    def __init__(self, executor: ThreadPoolExecutor, fn, *args, delay: float):
+        self._executor = executor
+        self._fn = fn
+        self._args = args
+        self._future = None
+        self._deadline = time.monotonic() + delay if delay >= 0 else None
+    
+    def timeout(self) -> Optional[float]:
+        """Seconds until the call is due (None when it is not scheduled or already started)"""
+        if self._deadline is None or self._future is not None:
+            return None
+        return max(0.0, self._deadline - time.monotonic())
+    
+    def poll(self):
+        """Submit the call if its deadline has passed"""
+        if self._future is None and self._deadline is not None and time.monotonic() >= self._deadline:
+            self._future = self._executor.submit(self._fn, *self._args)
+    
+    def result(self) -> Any:
+        """Submit the call now if it has not started and wait for its result"""
+        if self._future is None:
+            self._future = self._executor.submit(self._fn, *self._args)
+        return self._future.result()
+    
+    def cancel(self):
+        """Stop the call from starting, or cancel it if it has not run yet"""
+        self._deadline = None
+        if self._future is not None:
+            self._future.cancel()
+
+
+def _admit_queries(candidates: Iterable[str], seen: Set[str], cap: int) -> List[str]:
+    """Take up to `cap` queries whose normalized form is not in `seen` (updated in place)"""
+    admitted = []
+    for query in candidates:
+        if len(admitted) >= cap:
+            break
+        key = _query_cache_key(query)
+        if key not in seen:
+            seen.add(key)
+            admitted.append(query)
+    return admitted
+
+
+def _document_content(doc: Any) -> str:
+    """
+    Key used to identify a retrieved document when deduplicating
+    
+    Whitespace runs and case are normalized so chunks that differ only in
+    line wrapping or spacing (common across PDF/DOCX extractions) collapse.
+    """
+    content = doc.page_content if hasattr(doc, 'page_content') else str(doc)
+    return " ".join(content.split()).casefold()
+
 
 class RAGService:
     """Service for retrieving relevant documents from vector database"""
@@ -16,140 +221,113 @@ class RAGService:
     def __init__(self):
         self.vector_store = get_vector_store()
         self.retriever = None
+        self._retriever_call = None
+        self.semantic_cache = get_semantic_cache() if settings.RAG_SEMANTIC_CACHE_ENABLED else None
+        # Long-lived pool for multi-query search (the work is I/O-bound on Pinecone)
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.RAG_SEARCH_MAX_WORKERS,
+            thread_name_prefix="rag-search"
+        )
+        atexit.register(self.close)
         self._init_retriever()
     
+    def close(self):
+        """Shut down the search thread pool"""
+        self._executor.shutdown(wait=False)
+    
     def _init_retriever(self):
         """Initialize retriever once and cache it"""
         try:
             if self.vector_store:
-                # Use similarity search with score_threshold for better filtering
+                # Score thresholding is applied in search_documents, where match scores are available
                 self.retriever = self.vector_store.as_retriever(
-                    search_kwargs={
-                        "k": settings.PINECONE_RAG_K,
-                        "score_threshold": settings.PINECONE_RAG_SIMILARITY_THRESHOLD
-                    }
+                    search_kwargs={"k": settings.PINECONE_RAG_K}
                 )
             else:
                 self.retriever = None
         except Exception as e:
             logger.warning(f"Retriever initialization warning: {e}")
-            # Fallback without score_threshold if not supported
-            try:
-                if self.vector_store:
-                    self.retriever = self.vector_store.as_retriever(
-                        search_kwargs={"k": settings.PINECONE_RAG_K}
-                    )
-                else:
-                    self.retriever = None
-            except Exception as e2:
-                self.retriever = None
+            self.retriever = None
+        
+        # Resolve the retrieval method once (older retrievers only have get_relevant_documents)
+        if self.retriever is not None:
+            self._retriever_call = getattr(self.retriever, 'invoke', None) or self.retriever.get_relevant_documents
     
     def generate_answer_focused_queries(self, message: str) -> List[str]:
         """Generate queries that directly search for potential answer terms"""
+        key = _query_cache_key(message)
+        cached = _answer_query_cache.get(key)
+        if cached is not None:
+            return list(cached)
+        
         try:
             client = get_openai_client()
-            
-            prompt = f"""Given this question: "{message}"
-
-Think about what the SPECIFIC ANSWER might be in a document. Generate 5-8 search queries that directly target potential answer terms and concepts that would appear in the document's answer.
-
-For example:
-- Question: "What is the only good information about the stock?" 
-- Answer queries: ["insider information", "insider knowledge", "insiders know", "insiders know better", "insider trading information", "what insiders know about stock"]
-
-- Question: "What are the best technical indicators?"
-- Answer queries: ["support resistance", "moving average", "MA 50", "MA 200", "divergence", "technical indicators support resistance", "best indicators moving average"]
-
-Generate queries that search for the ANSWER TERMS, not just the question terms.
-
-Return ONLY a JSON array of search query strings:
-["query1", "query2", "query3", ...]"""
-            
-            response = client.chat.completions.create(
-                model=settings.OPENAI_QUERY_GEN_MODEL,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are an expert at predicting document answers and generating search queries for those answers."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
-                temperature=0.5,  # Slightly higher for more creative answer predictions
-                max_tokens=300
-            )
-            
-            query_text = response.choices[0].message.content.strip()
-            
-            # Clean up response
-            if query_text.startswith("```json"):
-                query_text = query_text[7:]
-            if query_text.startswith("```"):
-                query_text = query_text[3:]
-            if query_text.endswith("```"):
-                query_text = query_text[:-3]
-            query_text = query_text.strip()
-            
-            answer_queries = json.loads(query_text)
-            
-            if isinstance(answer_queries, list):
-                return [q.strip() for q in answer_queries if isinstance(q, str) and len(q.strip()) > 2]
+            response = client.chat.completions.create(**_answer_focused_query_request(message))
+            answer_queries = _valid_answer_queries(_parse_query_list(response))
+        except Exception as e:
+            logger.warning(f"Error generating answer-focused queries: {e}")
             return []
-                
+        
+        _answer_query_cache.put(key, answer_queries)
+        return answer_queries
+    
+    async def agenerate_answer_focused_queries(self, message: str) -> List[str]:
+        """Async version of generate_answer_focused_queries"""
+        key = _query_cache_key(message)
+        cached = _answer_query_cache.get(key)
+        if cached is not None:
+            return list(cached)
+        
+        try:
+            client = get_async_openai_client()
+            response = await client.chat.completions.create(**_answer_focused_query_request(message))
+            answer_queries = _valid_answer_queries(_parse_query_list(response))
         except Exception as e:
             logger.warning(f"Error generating answer-focused queries: {e}")
             return []
+        
+        _answer_query_cache.put(key, answer_queries)
+        return answer_queries
     
     def generate_search_queries(self, message: str) -> List[str]:
         """Generate multiple search queries using AI"""
+        key = _query_cache_key(message)
+        cached = _search_query_cache.get(key)
+        if cached is not None:
+            return list(cached)
+        
         try:
             client = get_openai_client()
-            
-            response = client.chat.completions.create(
-                model=settings.OPENAI_QUERY_GEN_MODEL,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are a search query optimization assistant. Generate diverse search queries to improve document retrieval."
-                    },
-                    {
-                        "role": "user", 
-                        "content": get_query_generation_prompt(message)
-                    }
-                ],
-                temperature=settings.OPENAI_QUERY_GEN_TEMPERATURE,
-                max_tokens=settings.OPENAI_QUERY_GEN_MAX_TOKENS
-            )
-            
-            query_text = response.choices[0].message.content.strip()
-            
-            # Clean up response
-            if query_text.startswith("```json"):
-                query_text = query_text[7:]
-            if query_text.startswith("```"):
-                query_text = query_text[3:]
-            if query_text.endswith("```"):
-                query_text = query_text[:-3]
-            query_text = query_text.strip()
-            
-            search_queries = json.loads(query_text)
-            
-            if isinstance(search_queries, list):
-                valid_queries = [q.strip() for q in search_queries if isinstance(q, str) and len(q.strip()) > 2]
-                if not valid_queries:
-                    return [message]
-                # Return up to 12 queries for better semantic coverage
-                return valid_queries[:12]
-            else:
-                return [message]
-                
-        except json.JSONDecodeError as e:
+            response = client.chat.completions.create(**_search_query_request(message))
+            search_queries = _valid_search_queries(_parse_query_list(response), message)
+        except orjson.JSONDecodeError as e:
+            return [message]
+        except Exception as e:
+            logger.error(f"Error generating search queries with AI: {e}", exc_info=True)
+            return [message]
+        
+        _search_query_cache.put(key, search_queries)
+        return search_queries
+    
+    async def agenerate_search_queries(self, message: str) -> List[str]:
+        """Async version of generate_search_queries"""
+        key = _query_cache_key(message)
+        cached = _search_query_cache.get(key)
+        if cached is not None:
+            return list(cached)
+        
+        try:
+            client = get_async_openai_client()
+            response = await client.chat.completions.create(**_search_query_request(message))
+            search_queries = _valid_search_queries(_parse_query_list(response), message)
+        except orjson.JSONDecodeError as e:
             return [message]
         except Exception as e:
             logger.error(f"Error generating search queries with AI: {e}", exc_info=True)
             return [message]
+        
+        _search_query_cache.put(key, search_queries)
+        return search_queries
     
     def search_documents(self, query: str) -> List[Any]:
         """Search for documents using a single query with similarity filtering"""
@@ -157,75 +335,197 @@ Return ONLY a JSON array of search query strings:
             return []
         
         try:
-            docs = self.retriever.invoke(query)
-            # Filter by similarity score if available
-            return self._filter_by_similarity(docs)
-        except:
-            try:
-                docs = self.retriever.get_relevant_documents(query)
-                return self._filter_by_similarity(docs)
-            except Exception as e:
-                logger.warning(f"Document search error: {e}")
-                return []
-    
-    def _filter_by_similarity(self, documents: List[Any]) -> List[Any]:
-        """Filter documents by similarity score threshold (disabled by default for better recall)"""
-        if not documents:
+            if settings.PINECONE_RAG_SIMILARITY_THRESHOLD > 0:
+                # The retriever drops match scores, so query with scores to apply the threshold
+                results = self.vector_store.similarity_search_with_score(query, k=settings.PINECONE_RAG_K)
+                return self._filter_by_similarity(results)
+            return self._retriever_call(query)
+        except Exception as e:
+            logger.warning(f"Document search error: {e}")
             return []
-        
+    
+    def _filter_by_similarity(self, results: List[Tuple[Any, float]]) -> List[Any]:
+        """Keep documents whose Pinecone match score clears the threshold (disabled by default for better recall)"""
         # If threshold is 0, return all documents (no filtering)
         threshold = settings.PINECONE_RAG_SIMILARITY_THRESHOLD
         if threshold <= 0:
-            return documents
+            return [doc for doc, score in results]
         
-        filtered_docs = []
-        for doc in documents:
-            # Check if document has similarity score in metadata
-            if hasattr(doc, 'metadata') and doc.metadata:
-                score = doc.metadata.get('score') or doc.metadata.get('similarity_score')
-                if score is not None:
-                    # Pinecone returns scores as 0-1, where 1 is most similar
-                    if score >= threshold:
-                        filtered_docs.append(doc)
-                    continue
-            
-            # If no score available, include the document
-            filtered_docs.append(doc)
+        # Pinecone returns scores as 0-1, where 1 is most similar
+        filtered_docs = [doc for doc, score in results if score >= threshold]
         
         # If we filtered too aggressively, keep at least top results
-        if not filtered_docs and documents:
-            return documents[:min(10, len(documents))]
+        if not filtered_docs and results:
+            return [doc for doc, score in results[:10]]
         
         return filtered_docs
     
-    def search_documents_parallel(self, queries: List[str]) -> List[Any]:
-        """Search for documents using multiple queries in parallel"""
-        if not self.retriever or not queries:
+    def search_documents_by_vector(self, query_vector: List[float]) -> List[Any]:
+        """Search for documents with a precomputed query embedding"""
+        try:
+            results = self.vector_store.similarity_search_by_vector_with_score(
+                query_vector,
+                k=settings.PINECONE_RAG_K
+            )
+            return self._filter_by_similarity(results)
+        except Exception as e:
+            logger.warning(f"Vector search error: {e}")
             return []
+    
+    def _embed_queries(self, queries: List[str]) -> Optional[List[List[float]]]:
+        """Embed all search queries in one batched request (None on failure)"""
+        try:
+            return get_embeddings().embed_documents(queries)
+        except Exception as e:
+            logger.warning(f"Batched query embedding failed, embedding per query: {e}")
+            return None
+    
+    def iter_search_results(
+        self,
+        queries: List[str],
+        query_futures: Sequence[Future] = (),
+        searched: Sequence[str] = (),
+        hedge: Optional[_HedgedCall] = None
+    ) -> Iterator[List[Any]]:
+        """
+        Yield each query's documents as its search completes
         
-        relevant_docs = []
+        `query_futures` resolve to further query lists (the LLM-generated
+        queries); each list is searched as soon as it arrives, minus
+        case-insensitive duplicates of `queries`, `searched` and earlier
+        lists, with the RAG_MAX_QUERIES budget split evenly between them.
         
-        if settings.CHAT_PARALLEL_SEARCH and len(queries) > 1:
-            def search_query(query: str):
-                return self.search_documents(query)
-            
-            with ThreadPoolExecutor(max_workers=min(len(queries), 5)) as executor:
-                futures = {executor.submit(search_query, q): q for q in queries}
-                for future in as_completed(futures):
+        The embeddings for each list are computed in one batched call, so
+        each parallel search is only a Pinecone query. Searches still pending
+        when the caller stops iterating are cancelled. At most
+        RAG_PER_REQUEST_CONCURRENCY searches are in flight at once, so one
+        retrieval cannot monopolize the shared pool. A `hedge` is polled
+        whenever this loop wakes, so it starts on time while searches run.
+        """
+        if not self.retriever or not (queries or query_futures):
+            return
+        
+        seen = {_query_cache_key(q) for q in chain(queries, searched)}
+        share = 0
+        if query_futures:
+            share = -(-max(0, settings.RAG_MAX_QUERIES - len(seen)) // len(query_futures))
+        
+        def generated_batch(future: Future) -> List[str]:
+            try:
+                candidates = future.result()
+            except Exception as e:
+                logger.warning(f"Query generation exception: {e}")
+                return []
+            batch = _admit_queries(candidates, seen, share)
+            logger.info(f"Searching {len(batch)} of {len(candidates)} generated queries")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Query cache stats: search=%s, answer=%s", _search_query_cache.stats(), _answer_query_cache.stats())
+                logger.debug("Generated query sample: %s...", batch[:8])
+            return batch
+        
+        if not settings.CHAT_PARALLEL_SEARCH:
+            generated = chain.from_iterable(generated_batch(f) for f in as_completed(query_futures))
+            for query in chain(queries, generated):
+                if hedge:
+                    hedge.poll()
+                docs = self.search_documents(query)
+                if docs:
+                    yield docs
+            return
+        
+        jobs = deque()
+        
+        def enqueue(batch: List[str]):
+            query_vectors = self._embed_queries(batch) if len(batch) > 1 and self.vector_store else None
+            if query_vectors is not None:
+                jobs.extend((self.search_documents_by_vector, v) for v in query_vectors)
+            else:
+                jobs.extend((self.search_documents, q) for q in batch)
+        
+        enqueue(queries)
+        sources = set(query_futures)
+        in_flight = set()
+        max_in_flight = max(1, settings.RAG_PER_REQUEST_CONCURRENCY)
+        try:
+            while True:
+                # The pool is shared by all requests; keep only a few of this request's searches in flight
+                while jobs and len(in_flight) < max_in_flight:
+                    fn, arg = jobs.popleft()
+                    in_flight.add(self._executor.submit(fn, arg))
+                if not in_flight and not sources:
+                    break
+                
+                done, _ = wait(
+                    in_flight | sources,
+                    timeout=hedge.timeout() if hedge else None,
+                    return_when=FIRST_COMPLETED
+                )
+                if hedge:
+                    hedge.poll()
+                for future in done:
+                    if future in sources:
+                        sources.discard(future)
+                        enqueue(generated_batch(future))
+                        continue
+                    in_flight.discard(future)
                     try:
                         docs = future.result()
-                        if docs:
-                            relevant_docs.extend(docs)
                     except Exception as e:
                         logger.warning(f"Query search exception: {e}")
-        else:
-            for query in queries:
-                docs = self.search_documents(query)
-                if docs:
-                    relevant_docs.extend(docs)
-        
+                        continue
+                    if docs:
+                        yield docs
+        finally:
+            for future in in_flight:
+                future.cancel()
+    
+    def search_documents_parallel(self, queries: List[str]) -> List[Any]:
+        """Search for documents using multiple queries in parallel"""
+        relevant_docs = []
+        for docs in self.iter_search_results(queries):
+            relevant_docs.extend(docs)
         return relevant_docs
     
+    def search_unique_documents(
+        self,
+        queries: List[str],
+        limit: int,
+        query_futures: Sequence[Future] = (),
+        searched: Sequence[str] = (),
+        hedge: Optional[_HedgedCall] = None
+    ) -> List[Any]:
+        """
+        Search with multiple queries, deduplicating results as they stream in
+        
+        Stops (cancelling outstanding searches) once `limit` unique documents
+        are found. Documents keep completion order, as with
+        search_documents_parallel followed by deduplicate_documents.
+        `query_futures`, `searched` and `hedge` are passed to
+        iter_search_results.
+        """
+        seen_content = set()
+        unique_docs = []
+        results = self.iter_search_results(queries, query_futures, searched, hedge)
+        try:
+            for docs in results:
+                for doc in docs:
+                    content = _document_content(doc)
+                    if content not in seen_content:
+                        seen_content.add(content)
+                        unique_docs.append(doc)
+                if len(unique_docs) >= limit:
+                    break
+        finally:
+            results.close()
+        return unique_docs[:limit]
+    
+    def _interleave_documents(self, first: List[Any], second: List[Any], limit: int) -> List[Any]:
+        """Merge two ranked result lists round-robin, dropping duplicates, up to `limit` documents"""
+        merged = []
+        for i in range(max(len(first), len(second))):
+            merged.extend(docs[i] for docs in (first, second) if i < len(docs))
+        return self.deduplicate_documents(merged)[:limit]
+    
     def deduplicate_documents(self, documents: List[Any]) -> List[Any]:
         """Remove duplicate documents while preserving relevance order"""
         if not documents:
@@ -235,81 +535,218 @@ Return ONLY a JSON array of search query strings:
         unique_docs = []
         
         for doc in documents:
-            content = doc.page_content if hasattr(doc, 'page_content') else str(doc)
-            # Use longer hash for better deduplication (first 500 chars)
-            content_hash = hash(content[:500])
-            if content_hash not in seen_content:
-                seen_content.add(content_hash)
+            content = _document_content(doc)
+            # Key on the full (whitespace/case-normalized) content
+            if content not in seen_content:
+                seen_content.add(content)
                 unique_docs.append(doc)
         
         # Return up to configured K, preserving order (most relevant first)
         return unique_docs[:settings.PINECONE_RAG_K]
     
+    def _exact_cached_context(self, message: str) -> Optional[str]:
+        """Look up context retrieved for the same message text (no embedding needed)"""
+        if self.semantic_cache is None:
+            return None
+        context = self.semantic_cache.get_exact(message)
+        if context is not None:
+            logger.info("Exact query cache hit; skipping embedding, query generation and vector search")
+        return context
+    
+    def _cached_context(self, query_embedding: Optional[List[float]]) -> Optional[str]:
+        """Look up context retrieved for a semantically equivalent earlier query"""
+        if query_embedding is None:
+            return None
+        context = self.semantic_cache.get(query_embedding)
+        if context is not None:
+            logger.info("Semantic cache hit; skipping query generation and vector search")
+        return context
+    
+    def _cache_context(self, message: str, query_embedding: Optional[List[float]], context: Optional[str]):
+        """Remember retrieved context for identical and semantically equivalent future queries"""
+        if self.semantic_cache is not None and context:
+            self.semantic_cache.put(query_embedding, context, text=message)
+    
+    def _query_embedding(self, message: str) -> Optional[List[float]]:
+        """Embed a message for the semantic cache (None when disabled or on failure)"""
+        if self.semantic_cache is None:
+            return None
+        try:
+            return get_embeddings().embed_query(message)
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed: {e}")
+            return None
+    
+    async def _aquery_embedding(self, message: str) -> Optional[List[float]]:
+        """Async version of _query_embedding"""
+        if self.semantic_cache is None:
+            return None
+        try:
+            return await get_embeddings().aembed_query(message)
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed: {e}")
+            return None
+    
+    def _submit_direct_search(self, message: str, query_embedding: Optional[List[float]]) -> Future:
+        """Search for the original message, reusing its cache embedding when there is one"""
+        if query_embedding is not None:
+            return self._executor.submit(self.search_documents_by_vector, query_embedding)
+        return self._executor.submit(self.search_documents, message)
+    
     def retrieve_context(self, message: str, use_query_generation: bool = True) -> Optional[str]:
         """Retrieve relevant context from documents for a message with enhanced retrieval"""
         if not self.retriever or not settings.CHAT_RAG_ENABLED:
             return None
         
+        cached = self._exact_cached_context(message)
+        if cached is not None:
+            return cached
+        
+        # Generate search queries for better retrieval while the message is embedded for the cache
+        query_futures = []
+        if use_query_generation and settings.CHAT_QUERY_GEN_ENABLED:
+            query_futures = [
+                self._executor.submit(self.generate_search_queries, message),
+                self._executor.submit(self.generate_answer_focused_queries, message)
+            ]
+        
+        query_embedding = self._query_embedding(message)
+        cached = self._cached_context(query_embedding)
+        if cached is not None:
+            for future in query_futures:
+                future.cancel()
+            return cached
+        
+        direct_future = self._submit_direct_search(message, query_embedding)
+        context = self._retrieve_with_queries(message, [], query_futures, direct_future, query_embedding)
+        self._cache_context(message, query_embedding, context)
+        return context
+    
+    async def aretrieve_context(self, message: str, use_query_generation: bool = True) -> Optional[str]:
+        """
+        Async version of retrieve_context
+        
+        Both query-generation calls run on the event loop concurrently with
+        the cache embedding and then the search for the original message; the
+        blocking vector searches run in a worker thread, which starts on each
+        generated query list as soon as it arrives.
+        """
+        if not self.retriever or not settings.CHAT_RAG_ENABLED:
+            return None
+        
+        cached = self._exact_cached_context(message)
+        if cached is not None:
+            return cached
+        
+        query_futures = []
+        if use_query_generation and settings.CHAT_QUERY_GEN_ENABLED:
+            loop = asyncio.get_running_loop()
+            # Thread-safe futures so the search worker can pick up each list as it completes
+            query_futures = [
+                asyncio.run_coroutine_threadsafe(self.agenerate_search_queries(message), loop),
+                asyncio.run_coroutine_threadsafe(self.agenerate_answer_focused_queries(message), loop)
+            ]
+        
+        query_embedding = await self._aquery_embedding(message)
+        cached = self._cached_context(query_embedding)
+        if cached is not None:
+            for future in query_futures:
+                future.cancel()
+            return cached
+        
+        direct_future = self._submit_direct_search(message, query_embedding)
+        context = await asyncio.to_thread(
+            self._retrieve_with_queries, message, [], query_futures, direct_future, query_embedding
+        )
+        self._cache_context(message, query_embedding, context)
+        return context
+    
+    def _fallback_search(self, message: str, query_embedding: Optional[List[float]] = None) -> List[Any]:
+        """Unfiltered vector store search for the original message (by its embedding when known)"""
         try:
-            # Generate search queries for better retrieval
-            search_queries = []
-            if use_query_generation and settings.CHAT_QUERY_GEN_ENABLED:
-                # Generate question-based queries
-                question_queries = self.generate_search_queries(message)
-                search_queries.extend(question_queries)
-                
-                # Generate answer-focused queries (search for answer terms directly)
-                answer_queries = self.generate_answer_focused_queries(message)
-                search_queries.extend(answer_queries)
-                
-                # Always include original message as first query
-                if message not in search_queries:
-                    search_queries.insert(0, message)
-                
-                logger.info(f"Generated {len(question_queries)} question queries + {len(answer_queries)} answer queries = {len(search_queries)} total for: '{message[:50]}...'")
-                logger.debug(f"Sample queries: {search_queries[:8]}...")
+            if query_embedding is not None:
+                results = self.vector_store.similarity_search_by_vector_with_score(
+                    query_embedding,
+                    k=settings.PINECONE_RAG_K
+                )
             else:
-                search_queries = [message]
-            
-            # Search documents with multiple queries
-            relevant_docs = self.search_documents_parallel(search_queries)
+                # Use vector store's similarity_search_with_score for better control
+                results = self.vector_store.similarity_search_with_score(
+                    message,
+                    k=settings.PINECONE_RAG_K  # Get more results
+                )
+        except Exception as e:
+            logger.warning(f"Direct vector search fallback failed: {e}")
+            return []
+        # Include all results since threshold is disabled
+        return [doc for doc, score in results]
+    
+    def _retrieve_with_queries(
+        self,
+        message: str,
+        search_queries: List[str],
+        query_futures: Sequence[Future] = (),
+        direct_future: Optional[Future] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> Optional[str]:
+        """
+        Search with the given queries (with fallbacks) and build the RAG context
+        
+        `query_futures` resolve to generated query lists, each searched as
+        soon as it arrives. `direct_future` resolves to the original message's
+        results (searched concurrently with generation); they are interleaved
+        with the generated-query results and do not count toward the early
+        stop at PINECONE_RAG_K documents. The direct vector store fallback
+        (by `query_embedding` when given, so the message is embedded once)
+        runs after a miss; when RAG_FALLBACK_MS >= 0 it is hedged instead,
+        submitted to the search pool once multi-query search has run that
+        long and cancelled as soon as the main path finds documents.
+        """
+        message_searched = direct_future is not None or message in search_queries
+        fallback = None
+        if self.vector_store:
+            fallback = _HedgedCall(
+                self._executor, self._fallback_search, message, query_embedding,
+                delay=settings.RAG_FALLBACK_MS / 1000
+            )
+        try:
+            # Search documents with multiple queries, stopping once K unique documents are found
+            relevant_docs = self.search_unique_documents(
+                search_queries,
+                settings.PINECONE_RAG_K,
+                query_futures=query_futures,
+                searched=[message] if direct_future is not None else (),
+                hedge=fallback
+            )
+            if direct_future is not None:
+                relevant_docs = self._interleave_documents(direct_future.result(), relevant_docs, settings.PINECONE_RAG_K)
             
-            # If no results from parallel search, try original message directly
-            if not relevant_docs:
+            # If no results from parallel search, try original message directly (unless already searched)
+            if not relevant_docs and not message_searched:
                 logger.debug("No results from parallel search, trying direct search...")
                 relevant_docs = self.search_documents(message)
             
-            # If still no results, try direct vector store search as fallback
-            if not relevant_docs and self.vector_store:
-                logger.debug("Trying direct vector store search as fallback...")
-                try:
-                    # Use vector store's similarity_search_with_score for better control
-                    results = self.vector_store.similarity_search_with_score(
-                        message,
-                        k=settings.PINECONE_RAG_K  # Get more results
-                    )
-                    # Include all results since threshold is disabled
-                    relevant_docs = [doc for doc, score in results]
-                    
-                    if relevant_docs:
-                        logger.info(f"Direct vector search fallback found {len(relevant_docs)} documents")
-                except Exception as e:
-                    logger.warning(f"Direct vector search fallback failed: {e}")
+            # If still no results, use the direct vector store search
+            if not relevant_docs and fallback:
+                logger.debug("Using direct vector store search as fallback...")
+                relevant_docs = fallback.result()
+                if relevant_docs:
+                    logger.info(f"Direct vector search fallback found {len(relevant_docs)} documents")
             
             # Deduplicate while preserving relevance order
             relevant_docs = self.deduplicate_documents(relevant_docs)
             
             # Log retrieval stats for debugging
             if relevant_docs:
-                # Log sample of retrieved content for debugging
-                sample_contents = []
-                for i, doc in enumerate(relevant_docs[:3]):  # Log first 3 chunks
-                    if hasattr(doc, 'page_content'):
-                        content = doc.page_content[:150] + "..." if len(doc.page_content) > 150 else doc.page_content
-                        sample_contents.append(f"Chunk {i+1}: {content}")
-                
                 logger.info(f"Retrieved {len(relevant_docs)} document chunks for query: '{message[:50]}...'")
-                logger.debug(f"Sample chunks:\n" + "\n".join(sample_contents))
+                # Log sample of retrieved content for debugging (only built when DEBUG is enabled)
+                if logger.isEnabledFor(logging.DEBUG):
+                    sample_contents = []
+                    for i, doc in enumerate(relevant_docs[:3]):  # Log first 3 chunks
+                        if hasattr(doc, 'page_content'):
+                            content = doc.page_content[:150] + "..." if len(doc.page_content) > 150 else doc.page_content
+                            sample_contents.append(f"Chunk {i+1}: {content}")
+                    logger.debug("Sample chunks:\n%s", "\n".join(sample_contents))
                 return build_rag_context(relevant_docs)
             else:
                 logger.warning(f"No relevant documents found for query: '{message[:50]}...'")
@@ -319,4 +756,10 @@ Return ONLY a JSON array of search query strings:
         except Exception as e:
             logger.error(f"RAG retrieval error: {e}", exc_info=True)
             return None
+        finally:
+            if fallback:
+                fallback.cancel()
+            # Generation still outstanding after an early stop or error is no longer needed
+            for future in query_futures:
+                future.cancel()
 
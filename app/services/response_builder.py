@@ -4,6 +4,13 @@ from app.core.config import settings
 from app.utils.prompts import SYSTEM_PROMPT
 from app.utils.validators import validate_name, validate_email, validate_income
 
+# Collected user fields, in the order they are asked for
+USER_FIELD_VALIDATORS = (
+    ('name', validate_name),
+    ('email', validate_email),
+    ('income', validate_income),
+)
+
 class ResponseBuilder:
     """Service for building conversation context and messages"""
     
@@ -45,34 +52,21 @@ class ResponseBuilder:
         validated_fields = []
         invalid_fields = []
         
-        # Validate each field
-        if user_data.get('name'):
-            name = str(user_data.get('name', '')).strip()
-            if validate_name(name, "", check_user_feedback=False):
-                validated_fields.append('name')
-                user_context_parts.append(f"User's name: {name}")
-            else:
-                invalid_fields.append('name')
-        
-        if user_data.get('email'):
-            email = str(user_data.get('email', '')).strip()
-            if validate_email(email, "", check_user_feedback=False):
-                validated_fields.append('email')
-                user_context_parts.append(f"User's email: {email}")
-            else:
-                invalid_fields.append('email')
-        
-        if user_data.get('income'):
-            income = str(user_data.get('income', '')).strip()
-            if validate_income(income, "", check_user_feedback=False):
-                validated_fields.append('income')
-                user_context_parts.append(f"User's income: {income}")
+        # Validate each field (one lookup per field)
+        for field, validate in USER_FIELD_VALIDATORS:
+            value = user_data.get(field)
+            if not value:
+                continue
+            value = str(value).strip()
+            if validate(value, "", check_user_feedback=False):
+                validated_fields.append(field)
+                user_context_parts.append(f"User's {field}: {value}")
             else:
-                invalid_fields.append('income')
+                invalid_fields.append(field)
         
         # Determine what to ask for
         fields_to_ask = []
-        for field in ['name', 'email', 'income']:
+        for field, _ in USER_FIELD_VALIDATORS:
             if field not in validated_fields:
                 fields_to_ask.append(field)
         
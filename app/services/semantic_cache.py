@@ -0,0 +1,122 @@
+"""Semantic cache for RAG context, keyed by query embedding"""
+from typing import List, Optional, Sequence, Tuple
+import threading
+import time
+import numpy as np
+from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.utils.cache import TTLCache
+
+logger = get_logger(__name__)
+
+
+class SemanticCache:
+    """
+    In-memory cache mapping query embeddings to retrieved context
+    
+    A lookup matches the most similar cached query (cosine similarity, one
+    matrix-vector product over all entries) and hits when it clears
+    `threshold`. Entries expire after `ttl` seconds; once `max_size` is
+    reached the oldest entry is evicted. An exact tier keyed by normalized
+    query text is checked first, so verbatim repeats need no embedding.
+    """
+    
+    def __init__(self, threshold: float, ttl: float, max_size: int):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.RLock()
+        self._embeddings: Optional[np.ndarray] = None  # (n, dim) unit-norm float32 rows
+        self._entries: List[Tuple[str, float]] = []  # (context, expires_at), oldest first
+        self._exact = TTLCache(max_size, ttl)  # normalized query text -> context
+    
+    @staticmethod
+    def _text_key(text: str) -> str:
+        return text.strip().lower()
+    
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if not norm:
+            return None
+        return vector / norm
+    
+    def _evict_expired(self, now: float):
+        """Drop expired entries (all entries share one TTL, so they form a prefix)"""
+        expired = 0
+        while expired < len(self._entries) and self._entries[expired][1] <= now:
+            expired += 1
+        if expired:
+            del self._entries[:expired]
+            self._embeddings = self._embeddings[expired:] if self._entries else None
+    
+    def get(self, embedding: Sequence[float]) -> Optional[str]:
+        """Return cached context for a semantically equivalent query, if any"""
+        query = self._normalize(embedding)
+        if query is None:
+            return None
+        
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            if self._embeddings is None or self._embeddings.shape[1] != query.shape[0]:
+                return None
+            similarities = self._embeddings @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                return self._entries[best][0]
+        return None
+    
+    def get_exact(self, text: str) -> Optional[str]:
+        """Return cached context for the same query text (case/whitespace-insensitive)"""
+        return self._exact.get(self._text_key(text))
+    
+    def put(self, embedding: Optional[Sequence[float]], context: str, text: Optional[str] = None):
+        """Cache the context retrieved for a query embedding (and its text, if given)"""
+        if text is not None:
+            self._exact.put(self._text_key(text), context)
+        if embedding is None:
+            return
+        query = self._normalize(embedding)
+        if query is None:
+            return
+        
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            if self._embeddings is not None and self._embeddings.shape[1] != query.shape[0]:
+                # Embedding model changed; no cached vector is comparable anymore
+                self._embeddings = None
+                self._entries = []
+            if len(self._entries) >= self.max_size:
+                overflow = len(self._entries) - self.max_size + 1
+                del self._entries[:overflow]
+                self._embeddings = self._embeddings[overflow:]
+            
+            self._entries.append((context, time.monotonic() + self.ttl))
+            row = query[np.newaxis, :]
+            self._embeddings = row if self._embeddings is None or not len(self._embeddings) else np.vstack([self._embeddings, row])
+    
+    def clear(self):
+        """Drop every cached entry (e.g. after the indexed documents change)"""
+        with self._lock:
+            self._embeddings = None
+            self._entries = []
+        self._exact.clear()
+
+
+_semantic_cache: Optional[SemanticCache] = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Get or create the process-wide semantic cache (singleton)"""
+    global _semantic_cache
+    if _semantic_cache is None:
+        with _semantic_cache_lock:
+            if _semantic_cache is None:
+                _semantic_cache = SemanticCache(
+                    threshold=settings.RAG_SEMANTIC_CACHE_THRESHOLD,
+                    ttl=settings.RAG_SEMANTIC_CACHE_TTL,
+                    max_size=settings.RAG_SEMANTIC_CACHE_MAX_SIZE
+                )
+    return _semantic_cache
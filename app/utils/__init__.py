@@ -1,23 +1,31 @@
 """Utility functions and helpers"""
 from .dependencies import (
     get_openai_client,
+    get_async_openai_client,
     get_pinecone_client,
     get_vector_store,
-    get_embeddings
+    get_embeddings,
+    get_supabase_client
 )
 from .validators import (
     validate_name,
     validate_email,
     validate_income
 )
+from .sse import format_sse_event
+from .cache import TTLCache
 
 __all__ = [
     "get_openai_client",
+    "get_async_openai_client",
     "get_pinecone_client", 
     "get_vector_store",
     "get_embeddings",
+    "get_supabase_client",
     "validate_name",
     "validate_email",
-    "validate_income"
+    "validate_income",
+    "format_sse_event",
+    "TTLCache"
 ]
 
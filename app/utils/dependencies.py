@@ -1,17 +1,22 @@
 """Dependency injection utilities for external services"""
 from typing import Optional
-from openai import OpenAI
+import httpx
+from openai import OpenAI, AsyncOpenAI
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
 from pinecone import Pinecone
 from langchain_pinecone import PineconeVectorStore
+from supabase import create_client, Client
 from app.core.config import settings
 from langchain_pinecone import PineconeVectorStore
 
 # Global clients (singleton pattern)
 _openai_client: Optional[OpenAI] = None
+_async_openai_client: Optional[AsyncOpenAI] = None
 _pinecone_client: Optional[Pinecone] = None
-_embeddings: Optional[OpenAIEmbeddings] = None
+_embeddings: Optional[Embeddings] = None
 _vector_store: Optional[PineconeVectorStore] = None
+_supabase_client: Optional[Client] = None
 
 
 def get_openai_client() -> OpenAI:
@@ -22,25 +27,72 @@ def get_openai_client() -> OpenAI:
     return _openai_client
 
 
+def get_async_openai_client() -> AsyncOpenAI:
+    """Get or create async OpenAI client (singleton)"""
+    global _async_openai_client
+    if _async_openai_client is None:
+        _async_openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    return _async_openai_client
+
+
 def get_pinecone_client() -> Optional[Pinecone]:
     """Get or create Pinecone client (singleton)"""
     global _pinecone_client
     if _pinecone_client is None:
         try:
-            _pinecone_client = Pinecone(api_key=settings.PINECONE_API_KEY)
+            if settings.PINECONE_USE_GRPC:
+                from pinecone.grpc import PineconeGRPC
+                _pinecone_client = PineconeGRPC(api_key=settings.PINECONE_API_KEY)
+            else:
+                _pinecone_client = Pinecone(api_key=settings.PINECONE_API_KEY)
         except Exception as e:
             _pinecone_client = None
     return _pinecone_client
 
 
-def get_embeddings() -> OpenAIEmbeddings:
-    """Get or create embeddings model (singleton)"""
+def get_supabase_client() -> Client:
+    """
+    Get or create Supabase client (singleton)
+    
+    The PostgREST session is replaced with a pooled keep-alive (and HTTP/2
+    when enabled) httpx client so every DB call reuses one TLS connection.
+    """
+    global _supabase_client
+    if _supabase_client is None:
+        client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+        postgrest = client.postgrest
+        default_session = postgrest.session
+        postgrest.session = httpx.Client(
+            base_url=default_session.base_url,
+            headers=default_session.headers,
+            timeout=default_session.timeout,
+            http2=settings.SUPABASE_HTTP2,
+            limits=httpx.Limits(
+                max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+                max_connections=settings.SUPABASE_MAX_CONNECTIONS
+            )
+        )
+        default_session.close()
+        _supabase_client = client
+    return _supabase_client
+
+
+def get_embeddings() -> Embeddings:
+    """Get or create embeddings model (singleton) for the configured backend"""
     global _embeddings
     if _embeddings is None:
-        _embeddings = OpenAIEmbeddings(
-            openai_api_key=settings.OPENAI_API_KEY,
-            model=settings.OPENAI_EMBEDDING_MODEL
-        )
+        if settings.EMBEDDING_BACKEND == "local":
+            from app.services.embedding_service import LocalEmbeddings
+            _embeddings = LocalEmbeddings(
+                model_name=settings.LOCAL_EMBEDDING_MODEL,
+                batch_size=settings.LOCAL_EMBEDDING_BATCH_SIZE,
+                device=settings.LOCAL_EMBEDDING_DEVICE
+            )
+        else:
+            _embeddings = OpenAIEmbeddings(
+                openai_api_key=settings.OPENAI_API_KEY,
+                model=settings.OPENAI_EMBEDDING_MODEL
+            )
     return _embeddings
 
 
@@ -142,8 +142,8 @@ Generate search queries using these principles:
 
 CRITICAL: Generate queries that will find the SPECIFIC ANSWER in the documents, not just related topics. Think about what the document might actually say in response to this question.
 
-Return ONLY a JSON array of search query strings, no explanations:
-["query1", "query2", "query3", ...]
+Return ONLY a JSON object with the search query strings, no explanations:
+{{"queries": ["query1", "query2", "query3", ...]}}
 """
 
 
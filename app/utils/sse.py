@@ -0,0 +1,8 @@
+"""Server-Sent Events helpers"""
+from typing import Any, Dict
+import orjson
+
+
+def format_sse_event(event: Dict[str, Any]) -> bytes:
+    """Serialize an event dict as a single SSE `data:` frame"""
+    return b"data: " + orjson.dumps(event) + b"\n\n"
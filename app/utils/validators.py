@@ -11,7 +11,7 @@ def validate_name(name: str, message: str = "", check_user_feedback: bool = True
     if len(name_str) < settings.VALIDATION_NAME_MIN_LENGTH:
         return False
     
-    if name_str.lower() in settings.invalid_name_words_list:
+    if name_str.lower() in settings.invalid_name_words_set:
         return False
     
     return True
@@ -30,10 +30,9 @@ def validate_email(email: str, message: str = "", check_user_feedback: bool = Tr
     if '@' not in email_str:
         return False
     
-    if '@' in email_str:
-        domain = email_str.split('@')[-1]
-        if '.' not in domain:
-            return False
+    domain = email_str.rpartition('@')[2]
+    if '.' not in domain:
+        return False
     
     return True
 
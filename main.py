@@ -4,6 +4,7 @@ from fastapi.responses import JSONResponse
 from typing import List, Optional, Dict, Any
 import os
 import time
+import asyncio
 from dotenv import load_dotenv
 import uvicorn
 
@@ -75,6 +76,18 @@ app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
 app.include_router(documents.router, prefix="/api/documents", tags=["documents"])
 app.include_router(data.router, prefix="/api/data", tags=["data"])
 
+@app.on_event("startup")
+async def warm_up_services():
+    """Construct and warm the document service so the first upload skips client/model init"""
+    if not settings.DOCUMENT_WARMUP_ON_STARTUP:
+        return
+    try:
+        document_service = await asyncio.to_thread(documents.get_document_service)
+        await asyncio.to_thread(document_service.warm_up)
+        logger.info("Document service warmed up")
+    except Exception as e:
+        logger.warning(f"Document service warm-up failed: {e}")
+
 @app.get("/")
 async def root():
     logger.info("Root endpoint accessed")